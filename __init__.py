@@ -1,9 +1,10 @@
-import collections, math, types
+import collections, math, threading, types
 from random import random, choice
 from mcapi import *
 from bresenham import line
 from gol import GameOfLife
 from golfast import golfast
+import golpattern
 from df_maze import Maze
 
 from java.awt.image import BufferedImage
@@ -1492,18 +1493,17 @@ rg = pov('restlessgamer7')
 
 ################ GAME OF LIFE ################
 
-@synchronous()
-def golslow(world, cx, cy, cz, xradius=7, yradius=7, zradius=7, saturation=None, live=[Material.SLIME_BLOCK], dead=[Material.AIR, Material.CAVE_AIR]):
+def golread(world, cx, cy, cz, xradius=7, yradius=7, zradius=7, live=[Material.SLIME_BLOCK], dead=[Material.AIR, Material.CAVE_AIR]):
     """
-    Executes one iteration of the game of life, in 3D, using pure Python.
-    NB: This version is not used by the current game timer, due to performance.
+    Snapshots a box of the world as a game of life board: a dict of cells,
+    relative to the box's lowest corner, to True (live) or False (dead).
+    Blocks neither live nor dead are not part of the game.
+    NB: Reads blocks, so must run on the server main thread.
     """
     board = {}
     xsize = 2 * xradius + 1
     ysize = 2 * yradius + 1
     zsize = 2 * zradius + 1
-
-    # convert Minecraft state to game state
     for x in range(xsize):
         for y in range(ysize):
             for z in range(zsize):
@@ -1511,35 +1511,120 @@ def golslow(world, cx, cy, cz, xradius=7, yradius=7, zradius=7, saturation=None,
                 py = cy + y - yradius
                 pz = cz + z - zradius
                 blocktype = world.getBlockAt(px, py, pz).type
-                if saturation:
-                    # randomize the board -- but only for blocks in the game
-                    if blocktype in live or blocktype in dead:
-                        board[(x, y, z)] = random() < saturation
-                else:
-                    # set the cell to match the Minecraft state
-                    if blocktype in live:
-                        board[(x, y, z)] = True
-                    elif blocktype in dead:
-                        board[(x, y, z)] = False
-
-    gol3d = GameOfLife(max_adjacent_dims=3, isolation_threshold=5, birth_min=6, birth_max=7, overcrowding_threshold=9)
-    game = gol3d.start(board)
+                if blocktype in live:
+                    board[(x, y, z)] = True
+                elif blocktype in dead:
+                    board[(x, y, z)] = False
+    return board
 
-    if not saturation:
-        # iterate the game
-        game.next()
-
-    # convert game state back to Minecraft state
-    for x, y, z in game.state:
+def golwrite(world, cx, cy, cz, changes, xradius=7, yradius=7, zradius=7, live=[Material.SLIME_BLOCK], dead=[Material.AIR, Material.CAVE_AIR]):
+    """
+    Writes a game of life change list -- (cell, old, new) triples, as read
+    by golread -- back into the world, touching only the changed blocks.
+    NB: Writes blocks, so must run on the server main thread.
+    """
+    for (x, y, z), old, new in changes:
         px = cx + x - xradius
         py = cy + y - yradius
         pz = cz + z - zradius
-        world.getBlockAt(px, py, pz).type = live[0] if game.state[(x, y, z)] else dead[0]
+        world.getBlockAt(px, py, pz).type = live[0] if new else dead[0]
+
+def golstep(board, saturation=None, generations=1):
+    """
+    Computes the changes to a game of life board over some generations,
+    without touching the world; safe to call off the main thread.
+    :return: The board's final state, plus its (cell, old, new) change list.
+    """
+    if saturation:
+        # randomize the board -- but only for blocks in the game
+        final = {cell: random() < saturation for cell in board}
+        return final, [(cell, board[cell], final[cell]) for cell in board if final[cell] != board[cell]]
+
+    # iterate the game, merging each generation's changes
+    gol3d = GameOfLife(max_adjacent_dims=3, isolation_threshold=5, birth_min=6, birth_max=7, overcrowding_threshold=9)
+    game = gol3d.start(board, diffs=True)
+    first = {}
+    last = {}
+    for i in range(generations):
+        for cell, old, new in game.next():
+            first.setdefault(cell, old)
+            last[cell] = new
+    return game.state, [(cell, first[cell], last[cell]) for cell in last if first[cell] != last[cell]]
+
+@synchronous()
+def golslow(world, cx, cy, cz, xradius=7, yradius=7, zradius=7, saturation=None, live=[Material.SLIME_BLOCK], dead=[Material.AIR, Material.CAVE_AIR]):
+    """
+    Executes one iteration of the game of life, in 3D, using pure Python.
+    Only blocks whose cells changed state are written back to the world.
+    NB: This version is not used by the current game timer, due to performance.
+    See golbackground for a version which computes off the main thread.
+    """
+    board = golread(world, cx, cy, cz, xradius, yradius, zradius, live, dead)
+    final, changes = golstep(board, saturation)
+    golwrite(world, cx, cy, cz, changes, xradius, yradius, zradius, live, dead)
+
+def golbackground(world, cx, cy, cz, xradius=7, yradius=7, zradius=7, generations=1, period=10, resync=False, live=[Material.SLIME_BLOCK], dead=[Material.AIR, Material.CAVE_AIR]):
+    """
+    Runs the pure Python game of life, in 3D, computing on a worker thread.
+    Every period ticks, the main thread writes the changes of the last
+    finished computation, then hands the next one to the worker thread.
+    :param generations: Generations to advance per period (default 1).
+    :param resync: If true, re-read the world before each computation, to
+                   pick up blocks changed by players; otherwise the world
+                   is read only once, and the main thread only writes.
+    :return: The BackgroundGameOfLife task; cancel it to stop.
+    """
+    task = BackgroundGameOfLife(world, cx, cy, cz, xradius, yradius, zradius, generations, resync, live, dead)
+    task.runTaskTimer(PLUGIN, 0, period)
+    return task
+
+class BackgroundGameOfLife(BukkitRunnable):
+    """
+    Double-buffers the pure Python game of life between the main thread,
+    which reads and writes blocks, and a worker thread, which computes.
+    """
+    def __init__(self, world, cx, cy, cz, xradius, yradius, zradius, generations, resync, live, dead):
+        self.world = world
+        self.center = (cx, cy, cz)
+        self.radii = (xradius, yradius, zradius)
+        self.generations = generations
+        self.resync = resync
+        self.live = live
+        self.dead = dead
+        self.board = None # the board the pending changes lead to
+        self.changes = None # changes computed but not yet written
+        self.worker = None
+
+    def compute(self, board):
+        # NB: Runs on the worker thread; must not touch the world.
+        self.board, self.changes = golstep(board, generations=self.generations)
+
+    def run(self):
+        try:
+            if self.worker is not None:
+                if self.worker.is_alive():
+                    return # still computing; check again next period
+                self.worker = None
+            cx, cy, cz = self.center
+            xradius, yradius, zradius = self.radii
+            if self.changes is not None:
+                golwrite(self.world, cx, cy, cz, self.changes, xradius, yradius, zradius, self.live, self.dead)
+                self.changes = None
+            board = self.board
+            if board is None or self.resync:
+                board = golread(self.world, cx, cy, cz, xradius, yradius, zradius, self.live, self.dead)
+            self.worker = threading.Thread(target=self.compute, args=(board,))
+            self.worker.daemon = True
+            self.worker.start()
+        except Exception as e:
+            print(e)
 
 def gameoflife():
     global goltimer
     goltimer = GameOfLifeUpdater()
-    goltimer.runTaskTimer(PLUGIN, 0, 10)
+    # NB: Runs every tick, to write each generation's changes within a
+    # per-tick budget; generations themselves start every period ticks.
+    goltimer.runTaskTimer(PLUGIN, 0, 1)
 
 class GameOfLifeUpdater(BukkitRunnable):
     def __init__(self):
@@ -1551,6 +1636,10 @@ class GameOfLifeUpdater(BukkitRunnable):
         self.zMin = -228
         self.zMax = -216
 
+        self.period = 10 # ticks between writes to the world
+        self.generations = 1 # generations per write; more to fast-forward
+        self.ticks = 0
+
         self.game = golfast(self.world, self.xMin, self.xMax, self.yMin, self.yMax, self.zMin, self.zMax)
 
     def magiclever(self):
@@ -1585,15 +1674,34 @@ class GameOfLifeUpdater(BukkitRunnable):
         return self.gamelamp().blockPowered
 
     def clearboard(self):
-        self.game.shuffle(0)
+        # NB: Returns False, clearing nothing, while a step is in progress.
+        return self.game.shuffle(0)
+
+    def loadpattern(self, pattern, x=0, y=None, z=None):
+        """
+        Writes a Life pattern (RLE or plaintext; see golpattern) into the
+        game, with its top left corner at the given region coordinates
+        (default the top of the region, halfway along z).
+        """
+        if y is None: y = self.yMax - self.yMin
+        if z is None: z = (self.zMax - self.zMin) // 2
+        golpattern.place(self.game, pattern, x, y, z)
+
+    def readrules(self):
+        birth_min = self.inventory_item_count(232, 84, -181, 6)
+        birth_max = self.inventory_item_count(232, 84, -180, 6)
+        starvation_max = self.inventory_item_count(232, 84, -179, 3)
+        suffocation_min = self.inventory_item_count(232, 84, -178, 8)
+        self.game.setRules(3, birth_min, birth_max, starvation_max, suffocation_min)
 
     def run(self):
         try:
-            birth_min = self.inventory_item_count(232, 84, -181, 6)
-            birth_max = self.inventory_item_count(232, 84, -180, 6)
-            starvation_max = self.inventory_item_count(232, 84, -179, 3)
-            suffocation_min = self.inventory_item_count(232, 84, -178, 8)
-            self.game.setRules(3, birth_min, birth_max, starvation_max, suffocation_min)
+            self.ticks += 1
+            # write the last generation's changes, within the tick budget
+            idle = self.game.applyChanges()
+            if self.ticks < self.period:
+                return
+            self.ticks = 0
 
             # apparate the magic lever!
             lever = self.magiclever()
@@ -1602,13 +1710,21 @@ class GameOfLifeUpdater(BukkitRunnable):
                 lever.data = 14 # face=floor, facing=west, powered=true
 
             if self.randomizing():
+                # NB: Skipped while a step is in progress; tried again next period.
                 self.game.shuffle(0.1)
             elif self.iterating():
-                self.game.step()
+                if idle:
+                    # compute the next generation(s) off the main thread
+                    self.readrules()
+                    self.game.startStep(self.generations)
             else:
                 # disappear the lever!
                 lever = self.magiclever()
                 lever.type = Material.AIR
+                # NB: Finish writing the last generation, rather than leave
+                # the world half in one generation and half in the next.
+                self.game.flush()
+                self.game.close()
                 self.cancel()
         except Exception as e:
             print(e)
@@ -0,0 +1,180 @@
+"""
+Benchmarks the gol engines, stepping random boards of fixed seeds across
+board sizes, densities and neighborhood connectivities.
+
+Reports cells/second and peak memory for each configuration, and can save
+the results as a JSON baseline, or compare against one to catch regressions.
+Run with --help for options.
+"""
+
+import argparse, itertools, json, sys, time
+import gol
+
+try:
+    import tracemalloc
+except ImportError:
+    # NB: For Python 2 / Jython.
+    tracemalloc = None
+try:
+    import resource
+except ImportError:
+    resource = None
+
+class LegacyGameOfLife(gol.GameOfLife):
+    """
+    GameOfLife as it stepped before neighbor stencils and rule tables were
+    compiled: rebuilding the offsets and testing isneighbor for every cell.
+    """
+
+    def nextgamestate(self, board):
+        return gol.NeighborhoodBoardGame.nextgamestate(self, board)
+
+    def neighbors(self, board, cell):
+        offsets = itertools.product([-1, 0, 1], repeat=len(cell))
+        candidates = [tuple(sum(pair) for pair in zip(cell, offset)) for offset in offsets]
+        return {p: board[p] for p in candidates if p in board and self.isneighbor(cell, p)}
+
+    def nextcellstate(self, board, cell):
+        c = list(board.values()).count(True)
+        live = board[cell]
+        return c > self.isolation_threshold and c < self.overcrowding_threshold if live else \
+               c >= self.birth_min and c <= self.birth_max
+
+RULES = {
+    2: dict(isolation_threshold=2, birth_min=3, birth_max=3, overcrowding_threshold=5),
+    3: dict(isolation_threshold=5, birth_min=6, birth_max=7, overcrowding_threshold=9),
+}
+
+# Engine name -> (game class, function converting a dict board to its state).
+ENGINES = {
+    'legacy': (LegacyGameOfLife, lambda board: board),
+    'dict': (gol.GameOfLife, lambda board: board),
+    'sparse': (gol.GameOfLife, gol.sparse_board),
+    'board': (gol.GameOfLife, gol.Board),
+    'bitboard': (gol.GameOfLife, gol.BitBoard),
+}
+if gol.numpy is not None:
+    ENGINES['dense'] = (gol.GameOfLife, gol.dense_board)
+
+def peak_memory(f):
+    """
+    Calls f, returning its result plus the peak memory it used in bytes,
+    or None where that cannot be measured.
+    """
+    if tracemalloc is not None:
+        tracemalloc.start()
+        try:
+            result = f()
+            return result, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    result = f()
+    if resource is None:
+        return result, None
+    # NB: Without tracemalloc, fall back to the whole process's peak.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return result, rss if sys.platform == 'darwin' else rss * 1024
+
+def bench(engine, dim, size, density, dims, steps, seed, repeats=1):
+    """
+    Times stepping one configuration, returning a dict of its results.
+    The time is the best of the given number of repeated runs, since noise
+    only ever slows a run down.
+    """
+    game_class, convert = ENGINES[engine]
+    game = game_class(max_adjacent_dims=dims, **RULES[dim])
+    board = gol.random_board([size] * dim, saturation=density, seed=seed)
+
+    def run(steps):
+        state = game.start(convert(board))
+        start = time.time()
+        for i in range(steps):
+            state.next()
+        return time.time() - start
+
+    # NB: Memory tracing slows stepping down, so time a separate run.
+    seconds = min(run(steps) for i in range(max(1, repeats)))
+    peak = peak_memory(lambda: run(1))[1]
+    cells = size ** dim
+    return {
+        'engine': engine, 'dim': dim, 'size': size, 'density': density,
+        'max_adjacent_dims': dims, 'steps': steps, 'repeats': repeats, 'seconds': seconds,
+        'cells_per_second': cells * steps / seconds if seconds else float('inf'),
+        'peak_bytes': peak,
+    }
+
+def key(result):
+    return '%(engine)s/%(dim)dD/%(size)d/%(density)g/adj%(max_adjacent_dims)d' % result
+
+def expected3d():
+    """
+    Prints the 3D states test-gol.py expects, in its format.
+    """
+    gol3d = gol.GameOfLife(max_adjacent_dims=3, **RULES[3])
+    w = 2; h = 3; d = 4
+    game = gol3d.start(gol.random_board([w, h, d], seed=0xdeadbeef))
+    print('boards3d = [')
+    for i in range(3):
+        layers = ['\n'.join(''.join('X' if game.state[(x, y, z)] else '.' for x in range(w))
+                            for y in range(h)) for z in range(d)]
+        print('"""\n' + '\n\n'.join(layers) + '\n""",')
+        game.next()
+    print(']')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--engines', default=','.join(sorted(e for e in ENGINES if e != 'legacy')),
+                        help='comma-separated engines, of: ' + ', '.join(sorted(ENGINES)))
+    parser.add_argument('--sizes2d', default='32,64,128', help='2D board side lengths')
+    parser.add_argument('--sizes3d', default='8,16,24', help='3D board side lengths')
+    parser.add_argument('--densities', default='0.05,0.1,0.3', help='random_board saturations')
+    parser.add_argument('--steps', type=int, default=3, help='generations per run')
+    parser.add_argument('--repeats', type=int, default=5,
+                        help='runs per configuration, of which the fastest counts (default 5)')
+    parser.add_argument('--seed', type=int, default=12345, help='random_board seed')
+    parser.add_argument('--save', metavar='FILE', help='save results as a JSON baseline')
+    parser.add_argument('--compare', metavar='FILE', help='compare against a JSON baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='fraction of baseline cells/second that may be lost (default 0.25)')
+    parser.add_argument('--expected3d', action='store_true',
+                        help='print the 3D states for test-gol.py, then exit')
+    args = parser.parse_args()
+
+    if args.expected3d:
+        expected3d()
+        return 0
+
+    results = []
+    for dim, sizes in ((2, args.sizes2d), (3, args.sizes3d)):
+        for size in [int(s) for s in sizes.split(',') if s]:
+            for density in [float(d) for d in args.densities.split(',')]:
+                for dims in range(1, dim + 1):
+                    for engine in args.engines.split(','):
+                        result = bench(engine, dim, size, density, dims, args.steps, args.seed,
+                                       args.repeats)
+                        results.append(result)
+                        peak = result['peak_bytes']
+                        print('%-32s %12.0f cells/s %10s' % (key(result), result['cells_per_second'],
+                              '%.1f MB' % (peak / 1e6) if peak is not None else '?'))
+                        sys.stdout.flush()
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({key(r): r for r in results}, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = 0
+        for result in results:
+            before = baseline.get(key(result))
+            if before and result['cells_per_second'] < before['cells_per_second'] * (1 - args.tolerance):
+                regressions += 1
+                print('REGRESSION %s: %.0f -> %.0f cells/s' % (key(result),
+                      before['cells_per_second'], result['cells_per_second']))
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
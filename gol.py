@@ -7,13 +7,25 @@ to run with Python 2.7. So we'll settle for "abstract" methods
 that raise an exception, rather than disallowing instantiation.
 """
 
-import itertools, random
-import collections
+import collections, itertools, random
+from array import array
+from operator import add, mul
 try:
-    Iterator = collections.abc.Iterator
-except AttributeError:
+    from collections.abc import Iterator
+except ImportError:
     # NB: For Python 2 / Jython.
-    Iterator = collections.Iterator
+    from collections import Iterator
+try:
+    import numpy
+except ImportError:
+    # NB: NumPy is not available under Jython.
+    numpy = None
+try:
+    import multiprocessing
+    from multiprocessing.sharedctypes import RawArray
+except ImportError:
+    # NB: multiprocessing is not available under Jython.
+    multiprocessing = None
 
 
 class Game(object):
@@ -25,24 +37,119 @@ class Game(object):
     when the function is iterated, the game progresses.
     """
 
-    def start(self, state):
+    def start(self, state, incremental=False, history=0, on_cycle=None, stop_on_cycle=False, diffs=False):
         """
         Given a starting state, returns an iterator for advancing that state
         by repeated application of nextgamestate.
+
+        :param incremental: If true (board games only), the iterator tracks
+                            which cells changed in each step as its changed
+                            set, and the following step re-evaluates only
+                            the cells those changes could affect.
+        :param history: Number of recent states to remember (board games
+                        only; default 0, i.e. none). Each state is remembered
+                        by a Zobrist hash, updated from the changed cells of
+                        each step; when a state recurs within the history,
+                        the iterator's period becomes the cycle length, and
+                        its is_stable flag is set if the board stopped changing.
+        :param on_cycle: Function called with the iterator once a cycle is
+                         detected (default None).
+        :param stop_on_cycle: If true, the iterator raises StopIteration
+                              once a cycle is detected (default False).
+        :param diffs: If true (board games only), each step returns a list
+                      of (cell, old state, new state) triples for the cells
+                      it changed, also kept as the iterator's changes.
         """
         class GameState(Iterator):
-            def __init__(self, game, state):
+            def __init__(self, game, state, incremental, history, on_cycle, stop_on_cycle, diffs):
                 self.game = game
-                self.state = state 
+                self.state = state
+                self.incremental = incremental
+                self.diffs = diffs
+                self.changed = None # cells changed by the last step, if tracked
+                self.changes = None # (cell, old, new) triples of the last step, if diffs
+                self.generation = 0
+                self.period = None # length of the cycle the game entered, if any
+
+                self.history = history
+                self.on_cycle = on_cycle
+                self.stop_on_cycle = stop_on_cycle
+                if history:
+                    self._keys = {}
+                    self._rng = random.Random(0)
+                    self.hash = 0
+                    for cell, value in game.cellstates(state):
+                        self.hash ^= self._zobrist(cell, value)
+                    self._recent = collections.deque([self.hash])
+                    self._seen = {self.hash: 0} # hash -> last generation with it
+
+            @property
+            def is_stable(self):
+                """Whether the game has settled into a state which no longer changes."""
+                return self.period == 1
 
             def __next__(self):
-                self.state = self.game.nextgamestate(self.state)
+                if self.stop_on_cycle and self.period is not None:
+                    raise StopIteration
+                if not self.incremental and not self.history and not self.diffs:
+                    self.state = self.game.nextgamestate(self.state)
+                    self.generation += 1
+                    return
+                cells = None
+                if self.incremental and self.changed is not None:
+                    cells = self.game.affectedcells(self.state, self.changed)
+                    next_state = self.game.nextgamestate(self.state, cells)
+                else:
+                    # Nothing known yet: evaluate every cell.
+                    next_state = self.game.nextgamestate(self.state)
+                self.changed = self.game.changedcells(self.state, next_state, cells)
+                if self.history:
+                    for cell in self.changed:
+                        self.hash ^= self._zobrist(cell, self.state[cell]) ^ \
+                                     self._zobrist(cell, next_state[cell])
+                if self.diffs:
+                    self.changes = [(cell, self.state[cell], next_state[cell]) for cell in self.changed]
+                self.state = next_state
+                self.generation += 1
+                if self.history and self._remember() and self.stop_on_cycle:
+                    raise StopIteration
+                return self.changes
+
+            def _remember(self):
+                """
+                Records the current state's hash, returning True if this
+                reveals a cycle for the first time.
+                """
+                found = self.period is None and self.hash in self._seen
+                if found:
+                    self.period = self.generation - self._seen[self.hash]
+                self._seen[self.hash] = self.generation
+                self._recent.append(self.hash)
+                if len(self._recent) > self.history:
+                    oldest = self._recent.popleft()
+                    if self._seen[oldest] <= self.generation - len(self._recent):
+                        del self._seen[oldest]
+                if found and self.on_cycle:
+                    self.on_cycle(self)
+                return found
+
+            def _zobrist(self, cell, value):
+                """
+                Gets the random key of a cell in a state. Cells in a dead
+                (falsy) state contribute nothing to a board's hash.
+                """
+                if not value:
+                    return 0
+                key = (cell, value)
+                if key not in self._keys:
+                    self._keys[key] = self._rng.getrandbits(64)
+                return self._keys[key]
 
             # NB: For Python 2 / Jython.
             def next(self):
                 return self.__next__()
 
-        return GameState(self, state)
+        return GameState(self, state, incremental, history, on_cycle, stop_on_cycle, diffs)
 
     def nextgamestate(self, state): # Abstract!
         """
@@ -57,15 +164,38 @@ class BoardGame(Game):
     mapped to cell states (values).
     """
 
-    def nextgamestate(self, state): # Implemented!
+    def nextgamestate(self, state, cells=None): # Implemented!
         """
         Advances the board a step by invoking nextcellstate on each cell.
+        If cells are given, only those are evaluated; the rest carry over.
         """
         next_state = state.copy()
-        for cell in state:
+        for cell in state if cells is None else cells:
             next_state[cell] = self.nextcellstate(state, cell)
         return next_state
 
+    def changedcells(self, board, next_board, cells=None): # Default behavior!
+        """
+        Obtains the set of cells whose states differ between two boards.
+        If cells are given, only those are compared: the others are known
+        to be unchanged.
+        """
+        return set(c for c in (board if cells is None else cells) if next_board[c] != board[c])
+
+    def affectedcells(self, board, cells): # Default behavior!
+        """
+        Obtains the cells whose next state could depend on the given cells,
+        or None if that could be any cell of the board, as is the default.
+        """
+        return None
+
+    def cellstates(self, board): # Default behavior!
+        """
+        Obtains (cell, state) pairs for the cells of a board. Dead cells
+        may be omitted.
+        """
+        return board.items()
+
     def nextcellstate(self, board, cell): # Abstract!
         """
         Abstract method defining the next cell state for a given board + cell.
@@ -83,13 +213,14 @@ class NeighborhoodBoardGame(BoardGame):
     subset*, so that it considers only those neighbor cells when calculating.
     """
 
-    def nextgamestate(self, board): # Overridden!
+    def nextgamestate(self, board, cells=None): # Overridden!
         """
         Advances the game state a step by invoking nextcellstate on each cell,
         considering only each cell's neighbors, rather than the entire board.
+        If cells are given, only those are evaluated; the rest carry over.
         """
         next_board = board.copy()
-        for cell in board:
+        for cell in board if cells is None else cells:
             next_board[cell] = self.nextcellstate(self.neighbors(board, cell), cell)
         return next_board
 
@@ -118,6 +249,17 @@ class StableBoardGame(NeighborhoodBoardGame):
         """
         return {c: self.board[c] for c in self.board if self.isneighbor(cell, c)}
 
+    def affectedcells(self, board, cells): # Overridden!
+        """
+        Obtains the cells whose next state could depend on the given cells.
+        Being a neighbor is a symmetric relation, so these are the neighbors
+        of the given cells.
+        """
+        affected = set()
+        for cell in cells:
+            affected.update(self.neighbors(board, cell))
+        return affected
+
     def isneighbor(self, cell1, cell2): # Abstract!
         """
         Gets whether two cells are neighbors.
@@ -153,14 +295,26 @@ class LifeGame(NeighborhoodBoardGame):
         assert isolation_threshold < overcrowding_threshold
         assert birth_min <= birth_max
 
+        # Next cell state, indexed by [live][number of live neighbors]. Past
+        # the last count, no cell survives or is born, so counts are clamped.
+        self.ruletop = max(overcrowding_threshold, birth_max + 1)
+        counts = range(self.ruletop + 1)
+        self.rules = (
+            tuple(c >= birth_min and c <= birth_max for c in counts),
+            tuple(c > isolation_threshold and c < overcrowding_threshold for c in counts)
+        )
+
     def nextcellstate(self, board, cell): # Implemented!
         """
         Defines the next cell state for a given board + cell.
         """
         c = list(board.values()).count(True) # number of live neighbors
         live = board[cell] # assumes the cell is a neighbor of itself
-        return c > self.isolation_threshold and c < self.overcrowding_threshold if live else \
-               c >= self.birth_min and c <= self.birth_max
+        return self.rules[bool(live)][min(c, self.ruletop)]
+
+
+# Neighbor offset stencils, compiled once per (game type, dim, max_adjacent_dims).
+_stencils = {}
 
 
 class ZnBoardGame(StableBoardGame):
@@ -169,34 +323,78 @@ class ZnBoardGame(StableBoardGame):
     space.
     """
 
+    # Neighbors lie at most this many cells away along each axis.
+    radius = 1
+
     def __init__(self, max_adjacent_dims):
         self.max_adjacent_dims = max_adjacent_dims
 
-    def neighbors(self, board, cell): # Overridden for performance!
+    def nextgamestate(self, board, cells=None): # Overridden for sparse boards!
         """
-        Obtains, for a given board + cell, its neighbor cells.
+        Advances the game state a step. A SparseBoard is advanced by visiting
+        only its live cells plus their neighbors, since no other cell can
+        change; so the cost scales with the population, not the board volume.
+        Any other board is advanced cell by cell as usual.
         """
-        dim = len(cell)
+        if not isinstance(board, SparseBoard):
+            return StableBoardGame.nextgamestate(self, board, cells)
+        if not board:
+            return SparseBoard()
+
+        # Empty space must stay empty, or a sparse board would fill up.
+        origin = (0,) * len(next(iter(board)))
+        if self.nextcellstate(self.neighbors(SparseBoard(), origin), origin):
+            raise Exception("Rules give birth in empty space; use a bounded board")
 
-        # Iteration of all [-1/0/1, -1/0/1, ...] tuples, dim dimensions long.
-        # E.g. in 2D, this will be:
-        # [
-        #   (-1, -1), (-1, 0), (-1, 1),
-        #    (0, -1),  (0, 0),  (0, 1), 
-        #    (1, -1),  (1, 0),  (1, 1)
-        # ]
-        offsets = itertools.product([-1, 0, 1], repeat=dim)
+        # Only live cells and their neighbors can be live next generation.
+        candidates = set()
+        for cell in board:
+            candidates.update(self.neighbors(board, cell))
 
-        # List of coordinates corresponding to the current cell adjusted by each offset.
-        #
-        #   candidates = [cell ++ offset for offset in offsets]
-        #
-        # Where "++" is element-wise addition over equal-length lists/tuples.
-        # But sadly, Python does not have an operator like that (+ on lists
-        # concatenates them), so we have this tricky construction instead:
-        candidates = [tuple(sum(pair) for pair in zip(cell, offset)) for offset in offsets]
+        return SparseBoard(cell for cell in candidates
+                           if self.nextcellstate(self.neighbors(board, cell), cell))
 
-        return {p: board[p] for p in candidates if p in board and self.isneighbor(cell, p)}
+    def changedcells(self, board, next_board, cells=None): # Overridden for sparse boards!
+        """
+        Obtains the set of cells whose states differ between two boards.
+        For sparse boards, these are the cells live on only one of them.
+        """
+        if isinstance(board, SparseBoard):
+            return board.cells ^ next_board.cells
+        return StableBoardGame.changedcells(self, board, next_board, cells)
+
+    def neighbors(self, board, cell): # Overridden for performance!
+        """
+        Obtains, for a given board + cell, its neighbor cells.
+        """
+        # List of coordinates corresponding to the current cell adjusted by
+        # each offset of the stencil: element-wise addition of the two tuples.
+        candidates = [tuple(map(add, cell, offset)) for offset in self.stencil(len(cell))]
+        return {p: board[p] for p in candidates if p in board}
+
+    def stencil(self, dim):
+        """
+        Gets the offsets from a cell to each of its neighbors in dim-dimensional
+        space, including the zero offset, since a cell is its own neighbor.
+        The stencil is compiled from isneighbor once, then cached.
+        """
+        key = (type(self), dim, self.max_adjacent_dims, self.radius)
+        stencil = _stencils.get(key)
+        if stencil is None:
+            # Iteration of all [-1/0/1, -1/0/1, ...] tuples, dim dimensions long.
+            # E.g. in 2D, this will be:
+            # [
+            #   (-1, -1), (-1, 0), (-1, 1),
+            #    (0, -1),  (0, 0),  (0, 1),
+            #    (1, -1),  (1, 0),  (1, 1)
+            # ]
+            # Of which we keep only the offsets to actual neighbors.
+            # (With a larger radius, offsets range from -radius to radius.)
+            origin = (0,) * dim
+            offsets = itertools.product(range(-self.radius, self.radius + 1), repeat=dim)
+            stencil = tuple(o for o in offsets if self.isneighbor(origin, o))
+            _stencils[key] = stencil
+        return stencil
 
     def isneighbor(self, cell1, cell2): # Implemented!
         """
@@ -228,6 +426,22 @@ class ZnBoardGame(StableBoardGame):
 
         return sum(adist(pair[0], pair[1]) for pair in zip(cell1, cell2)) <= self.max_adjacent_dims
 
+    def neighborcounts(self, board):
+        """
+        Counts, for each cell of a boolean NumPy array board, how many of its
+        neighbors are live. As with neighbors, a cell is its own neighbor.
+        Cells beyond the edges of the array count as dead.
+        """
+        stencil = self.stencil(board.ndim)
+
+        # Sum the board shifted by each offset, reading from a dead-padded copy.
+        r = self.radius
+        padded = numpy.pad(board, r, mode='constant', constant_values=False)
+        counts = numpy.zeros(board.shape, dtype=numpy.min_scalar_type(len(stencil)))
+        for offset in stencil:
+            counts += padded[tuple(slice(r + o, r + o + n) for o, n in zip(offset, board.shape))]
+        return counts
+
 
 class GameOfLife(ZnBoardGame, LifeGame):
 
@@ -235,6 +449,800 @@ class GameOfLife(ZnBoardGame, LifeGame):
         ZnBoardGame.__init__(self, max_adjacent_dims)
         LifeGame.__init__(self, isolation_threshold, birth_min, birth_max, overcrowding_threshold)
 
+    def nextgamestate(self, board, cells=None): # Overridden for performance!
+        """
+        Advances the game state a step. Rather than building a neighbor board
+        for every cell, live neighbors are counted directly via the stencil,
+        and the next cell state is looked up in the rule table.
+        If cells are given, only those are evaluated; the rest carry over.
+
+        A boolean NumPy array board (see dense_board) is advanced all at once,
+        applying the life rules as vectorized masks over the neighbor counts.
+        Sparse, array and compact boards are always advanced whole, ignoring cells.
+        """
+        if numpy is not None and isinstance(board, numpy.ndarray):
+            return self.nextarraystate(board)
+        if isinstance(board, (Board, BitBoard)):
+            return board.advance(self.stencil(len(board.extents)), self.rules, self.ruletop)
+        if not board:
+            return board.copy()
+        stencil = self.stencil(len(next(iter(board))))
+        rules, top = self.rules, self.ruletop
+
+        if isinstance(board, SparseBoard):
+            # Empty space must stay empty, or a sparse board would fill up.
+            if rules[False][0]:
+                raise Exception("Rules give birth in empty space; use a bounded board")
+            # Each live cell adds to the count of every cell in its neighborhood.
+            counts = {}
+            for cell in board:
+                for offset in stencil:
+                    p = tuple(map(add, cell, offset))
+                    counts[p] = counts.get(p, 0) + 1
+            live = board.cells
+            return SparseBoard(p for p, c in counts.items()
+                               if rules[p in live][c if c < top else top])
+
+        next_board = board.copy()
+        get = board.get
+        for cell in board if cells is None else cells:
+            c = [get(tuple(map(add, cell, offset))) for offset in stencil].count(True)
+            next_board[cell] = rules[bool(board[cell])][c if c < top else top]
+        return next_board
+
+    def changedcells(self, board, next_board, cells=None): # Overridden for array boards!
+        """
+        Obtains the set of cells whose states differ between two boards.
+        """
+        if numpy is not None and isinstance(board, numpy.ndarray):
+            return set(tuple(c) for c in numpy.argwhere(board != next_board).tolist())
+        return ZnBoardGame.changedcells(self, board, next_board, cells)
+
+    def affectedcells(self, board, cells): # Overridden for array boards!
+        """
+        Obtains the cells whose next state could depend on the given cells.
+        """
+        if numpy is not None and isinstance(board, numpy.ndarray):
+            return None # array boards are always advanced whole
+        return ZnBoardGame.affectedcells(self, board, cells)
+
+    def cellstates(self, board): # Overridden for array boards!
+        """
+        Obtains (cell, state) pairs for the live cells of a board.
+        """
+        if numpy is not None and isinstance(board, numpy.ndarray):
+            return ((tuple(c), True) for c in numpy.argwhere(board).tolist())
+        return ZnBoardGame.cellstates(self, board)
+
+    def nextarraystate(self, board):
+        """
+        Advances a boolean NumPy array board a step.
+        """
+        c = self.neighborcounts(board)
+        survive = (c > self.isolation_threshold) & (c < self.overcrowding_threshold)
+        birth = (c >= self.birth_min) & (c <= self.birth_max)
+        return numpy.where(board, survive, birth)
+
+
+class LargerThanLife(GameOfLife):
+    """
+    A *Larger than Life* game is a game of life whose neighborhoods reach
+    radius cells along each axis: each cell's neighbors fill the box of
+    (2 * radius + 1)^n cells around it, including itself.
+
+    Enumerating such neighborhoods costs O(radius^n) per cell. Instead, live
+    neighbors are counted from a summed-area table -- the N-dimensional prefix
+    sums of the board -- whose 2^n corners around a box give its live count,
+    at any radius. Sparse boards are still counted per live cell, so their
+    cost keeps scaling with the population rather than the board volume.
+    """
+
+    def __init__(self, radius, isolation_threshold, birth_min, birth_max, overcrowding_threshold):
+        # NB: Every axis may be adjacent; the radius bounds the neighborhood.
+        GameOfLife.__init__(self, None, isolation_threshold, birth_min, birth_max, overcrowding_threshold)
+        self.radius = radius
+
+    def isneighbor(self, cell1, cell2): # Overridden!
+        """
+        Gets whether two cells are neighbors: at most radius apart along
+        every dimensional axis.
+        """
+        return all(abs(a - b) <= self.radius for a, b in zip(cell1, cell2))
+
+    def nextgamestate(self, board, cells=None): # Overridden!
+        """
+        Advances the game state a step, counting live neighbors from a
+        summed-area table of the board.
+        If cells are given, only those are evaluated; the rest carry over.
+        """
+        if numpy is not None and isinstance(board, numpy.ndarray):
+            return self.nextarraystate(board)
+        if isinstance(board, SparseBoard) or not board:
+            return GameOfLife.nextgamestate(self, board)
+
+        # Summed-area table over the box enclosing the board, with a leading
+        # row of zeros along each axis: table[i] = live cells in [lo, cell].
+        lo = [min(a) for a in zip(*board)]
+        extents = [max(a) - l + 1 for a, l in zip(zip(*board), lo)]
+        shape, strides = _layout(extents)
+        table = [0] * (shape[0] * strides[0])
+        base = sum(strides)
+        for cell in board:
+            if board[cell] == True:
+                table[sum((c - l) * stride for c, l, stride in zip(cell, lo, strides)) + base] = 1
+        for stride, n in zip(strides, shape):
+            for i in range(stride, len(table)):
+                if (i // stride) % n:
+                    table[i] += table[i - stride]
+
+        r = self.radius
+        rules, top = self.rules, self.ruletop
+        corners = list(itertools.product((0, 1), repeat=len(extents)))
+        next_board = board.copy()
+        for cell in board if cells is None else cells:
+            # Index along each axis of the box's low (exclusive) and high ends.
+            ends = [(max(c - l - r, 0), min(c - l + r, n - 1) + 1)
+                    for c, l, n in zip(cell, lo, extents)]
+            c = 0
+            for corner in corners:
+                i = sum(end[k] * stride for end, k, stride in zip(ends, corner, strides))
+                c += table[i] if (len(corner) - sum(corner)) % 2 == 0 else -table[i]
+            next_board[cell] = rules[bool(board[cell])][c if c < top else top]
+        return next_board
+
+    def neighborcounts(self, board): # Overridden!
+        """
+        Counts, for each cell of a boolean NumPy array board, how many of its
+        neighbors are live, from a summed-area table of the board.
+        """
+        table = numpy.pad(board.astype(numpy.int64), [(1, 0)] * board.ndim, mode='constant')
+        for axis in range(board.ndim):
+            table = numpy.cumsum(table, axis=axis)
+        r = self.radius
+        ends = [(numpy.maximum(numpy.arange(n) - r, 0), numpy.minimum(numpy.arange(n) + r, n - 1) + 1)
+                for n in board.shape]
+        counts = numpy.zeros(board.shape, dtype=numpy.int64)
+        for corner in itertools.product((0, 1), repeat=board.ndim):
+            sign = 1 if (board.ndim - sum(corner)) % 2 == 0 else -1
+            counts += sign * table[numpy.ix_(*[end[k] for end, k in zip(ends, corner)])]
+        return counts
+
+
+class SparseBoard(object):
+    """
+    A board spanning all of Z^n which stores only its live cells: every cell
+    not stored is dead. Patterns may therefore grow without bound.
+
+    Cell states read like a dict of cell -> True/False, but iterating a sparse
+    board yields only its live cells.
+    """
+
+    def __init__(self, cells=()):
+        self.cells = set(cells)
+
+    def __getitem__(self, cell):
+        return cell in self.cells
+
+    def __setitem__(self, cell, live):
+        if live:
+            self.cells.add(cell)
+        else:
+            self.cells.discard(cell)
+
+    def __contains__(self, cell):
+        return True # every cell of Z^n is on the board
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __eq__(self, other):
+        return isinstance(other, SparseBoard) and self.cells == other.cells
+
+    def __ne__(self, other):
+        return not self == other
+
+    def get(self, cell, default=None):
+        return cell in self.cells
+
+    def items(self):
+        return ((cell, True) for cell in self.cells)
+
+    def copy(self):
+        return SparseBoard(self.cells)
+
+    def bounds(self):
+        """
+        Gets the (min, max) corners of the box enclosing the live cells,
+        or None if there are no live cells.
+        """
+        if not self.cells:
+            return None
+        axes = list(zip(*self.cells))
+        return tuple(min(a) for a in axes), tuple(max(a) for a in axes)
+
+
+class Board(object):
+    """
+    A dense board of cells stored as bytes in a flat array, with a one-cell
+    border of dead cells around it. Each cell holds 1 if live, 0 if dead, or
+    -1 if it is not part of the game. A cell's offset into the array is the
+    dot product of its coordinates (shifted by one, for the border) with the
+    array's strides.
+
+    Cell states read and write like a dict of cell -> True/False, at a small
+    fraction of a dict's memory. For speed, cells may also be visited by
+    offset (see offsets and buffer) instead of by coordinates.
+
+    The board is double-buffered: each step writes the next generation into
+    a second array and returns a new view of the two arrays, so no stepping
+    allocates memory. The previous view stays readable until the step after,
+    which overwrites its array.
+    """
+
+    # Whether the board wraps a buffer it does not own (see frombuffer).
+    _shared = False
+
+    def __init__(self, board=None, extents=None, live=True):
+        """
+        :param board: The dict of cells to cell states to copy. Its cells must
+                      have non-negative coordinates; cells within its extents
+                      but missing from it are not part of the game.
+        :param extents: The extents of an all-dead board to create instead.
+        :param live: The value used for live state (default True).
+        """
+        if board is not None:
+            extents = [max(a) + 1 for a in zip(*board)]
+        self.extents = list(extents)
+        self.shape, self.strides = _layout(self.extents)
+        size = self.strides[0] * self.shape[0]
+        self._buffers = (self._allocate(size), self._allocate(size))
+        self._current = 0
+
+        if board is not None:
+            # Cells missing from the board hold -1 forever in both generations.
+            for cell in itertools.product(*[range(extent) for extent in self.extents]):
+                i = self.offset(cell)
+                self._buffers[0][i] = self._buffers[1][i] = \
+                    (1 if board[cell] == live else 0) if cell in board else -1
+
+    @classmethod
+    def frombuffer(cls, buffer, extents):
+        """
+        Wraps an existing flat buffer laid out as a Board's would be -- such
+        as a GameOfLife3D's cells -- without copying it: reads and writes of
+        the board go straight to the buffer. Such a board cannot advance,
+        since its next generation would not be in the buffer; copy it first.
+        :param buffer: The array of 1 (live), 0 (dead) and -1 (not in game)
+                       values, including the border.
+        :param extents: The extents of the board within the border.
+        """
+        board = cls.__new__(cls)
+        board.extents = list(extents)
+        board.shape, board.strides = _layout(board.extents)
+        if len(buffer) != board.strides[0] * board.shape[0]:
+            raise Exception("Buffer does not match the board's extents")
+        board._buffers = (buffer, buffer)
+        board._current = 0
+        board._shared = True
+        return board
+
+    @property
+    def buffer(self):
+        """The array holding the current generation."""
+        return self._buffers[self._current]
+
+    def __getitem__(self, cell):
+        if not self._inside(cell):
+            raise KeyError(cell)
+        return self._buffers[self._current][self.offset(cell)] == 1
+
+    def __setitem__(self, cell, live):
+        # NB: Cells beyond the extents would land in the border (or another
+        # row), where they are hidden yet still count as neighbors.
+        if not self._inside(cell):
+            raise KeyError(cell)
+        self._buffers[self._current][self.offset(cell)] = 1 if live else 0
+
+    def __contains__(self, cell):
+        return self._inside(cell) and self._buffers[self._current][self.offset(cell)] >= 0
+
+    def __iter__(self):
+        cells = itertools.product(*[range(extent) for extent in self.extents])
+        return (cell for cell in cells if cell in self)
+
+    def __len__(self):
+        return sum(1 for i in self.offsets())
+
+    def get(self, cell, default=None):
+        return self[cell] if cell in self else default
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        return (self[cell] for cell in self)
+
+    def items(self):
+        return ((cell, self[cell]) for cell in self)
+
+    def copy(self):
+        board = Board.__new__(Board)
+        board.__dict__.update(self.__dict__)
+        board._buffers = tuple(array('b', buf) for buf in self._buffers)
+        board._shared = False
+        return board
+
+    def offset(self, cell):
+        """
+        Gets the offset of a cell into the board's array.
+        """
+        # NB: Cell coordinates are shifted by one for the border.
+        return sum(map(mul, cell, self.strides)) + sum(self.strides)
+
+    def _inside(self, cell):
+        return len(cell) == len(self.extents) and \
+            all(0 <= c < e for c, e in zip(cell, self.extents))
+
+    def setrun(self, cell, states):
+        """
+        Sets the states of consecutive cells along the last axis, starting
+        at the given cell. Cells not part of the game are left alone; a run
+        reaching beyond the board raises a KeyError.
+        """
+        self._setrun(cell, array('b', [1 if live else 0 for live in states]))
+
+    def setbits(self, cell, length, bits):
+        """
+        Sets the states of consecutive cells along the last axis from the
+        bits of an integer, bit k holding the state of the k-th cell from the
+        given cell. Cells not part of the game are left alone.
+        """
+        run = array('b')
+        for k in range(0, length, 8):
+            run.extend(_BYTEBITS[bits >> k & 0xff])
+        del run[length:]
+        self._setrun(cell, run)
+
+    def _setrun(self, cell, run):
+        if not self._inside(cell) or cell[-1] + len(run) > self.extents[-1]:
+            raise KeyError(cell)
+        buf = self._buffers[self._current]
+        start = self.offset(cell)
+        stop = start + len(run)
+        if min(buf[start:stop]) >= 0:
+            buf[start:stop] = run
+        else:
+            for i, v in zip(range(start, stop), run):
+                if buf[i] >= 0:
+                    buf[i] = v
+
+    def offsets(self):
+        """
+        Iterates the offsets of the cells which are part of the game.
+        """
+        buf = self._buffers[self._current]
+        for start, stop in _runs(self.shape, self.strides, 0, self.extents[0]):
+            for i in range(start, stop):
+                if buf[i] >= 0:
+                    yield i
+
+    def advance(self, stencil, rules, top):
+        """
+        Advances the board a step, returning a view of the next generation.
+        :param stencil: Offsets from each cell to its neighbors.
+        :param rules: Next cell state, indexed by [live][live neighbor count].
+        :param top: The highest live neighbor count in the rules.
+        """
+        if self._shared:
+            raise Exception("A board sharing a buffer cannot advance; advance a copy")
+        offsets = [sum(map(mul, o, self.strides)) for o in stencil]
+        src = self._current
+        self._step(src, offsets, rules, top)
+        view = self.__class__.__new__(self.__class__)
+        view.__dict__.update(self.__dict__)
+        view._current = 1 - src
+        return view
+
+    def _step(self, src, offsets, rules, top):
+        _steprange(self._buffers[src], self._buffers[1 - src], self.shape,
+                   self.strides, offsets, rules, top, 0, self.extents[0])
+
+    def _allocate(self, size):
+        return array('b', [0]) * size
+
+
+class ShardedBoard(Board):
+    """
+    A dense Board split into slabs along its first axis, with each slab
+    advanced by its own worker process.
+
+    Both the current and the next generation live in shared memory. Each
+    worker reads the halo layer just beyond its slab directly from its
+    neighbors' slabs in the current generation, so no board is ever pickled
+    between steps. Results are identical to stepping the whole board in one
+    process.
+    """
+
+    def __init__(self, board=None, extents=None, workers=None, live=True):
+        """
+        :param board: The dict of cells to cell states to copy. Its cells must
+                      have non-negative coordinates; cells within its extents
+                      but missing from it are not part of the game.
+        :param extents: The extents of an all-dead board to create instead,
+                        e.g. to seed with fill_random without building a dict.
+        :param workers: Number of worker processes (default one per CPU).
+                        With one worker, or without multiprocessing (e.g.
+                        under Jython), slabs are advanced in this process.
+        :param live: The value used for live state (default True).
+        """
+        Board.__init__(self, board, extents, live=live)
+        if workers is None:
+            workers = multiprocessing.cpu_count() if multiprocessing else 1
+        self.workers = max(1, min(workers, self.extents[0]))
+
+        # Slab boundaries along the first axis, as evenly sized as possible.
+        n = self.extents[0]
+        self._slabs = [(n * k // self.workers, n * (k + 1) // self.workers)
+                       for k in range(self.workers)]
+        self._pipes = []
+        self._processes = []
+
+    def _step(self, src, offsets, rules, top):
+        if self.workers == 1 or multiprocessing is None:
+            Board._step(self, src, offsets, rules, top)
+            return
+        if not self._pipes:
+            self._start()
+        for pipe in self._pipes:
+            pipe.send((src, offsets, rules, top))
+        for pipe in self._pipes:
+            pipe.recv()
+
+    def _allocate(self, size):
+        if multiprocessing is None:
+            return Board._allocate(self, size)
+        return RawArray('b', size)
+
+    def close(self):
+        """
+        Stops the worker processes, if any are running.
+        """
+        for pipe in self._pipes:
+            pipe.send(None)
+        for process in self._processes:
+            process.join()
+        del self._pipes[:]
+        del self._processes[:]
+
+    def _start(self):
+        for lo, hi in self._slabs:
+            ours, theirs = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_shardworker,
+                args=(theirs, self._buffers, self.shape, self.strides, lo, hi))
+            process.daemon = True
+            process.start()
+            self._pipes.append(ours)
+            self._processes.append(process)
+
+
+
+class BitBoard(object):
+    """
+    A dense board packing its cells into bits: each row of cells along the
+    last axis is one Python integer, whose bit x holds the cell at x.
+
+    Neighbor counts are computed bit-sliced: the neighboring rows, shifted
+    into alignment, are summed through a ripple of bitwise full adders into
+    a few bit planes of counts, so each word operation processes a whole row
+    of cells at once. Needs no NumPy, so it works under Jython.
+
+    Cell states read like a dict of cell -> True/False.
+    """
+
+    def __init__(self, board=None, extents=None, live=True):
+        """
+        :param board: The dict of cells to cell states to copy. Its cells must
+                      have non-negative coordinates; cells within its extents
+                      but missing from it are not part of the game.
+        :param extents: The extents of an all-dead board to create instead.
+        :param live: The value used for live state (default True).
+        """
+        if board is not None:
+            extents = [max(a) + 1 for a in zip(*board)]
+        self.extents = list(extents)
+        self._width = self.extents[-1]
+        self._full = (1 << self._width) - 1
+
+        # Rows are laid out over all axes but the last, with a border of
+        # empty rows, so that every row has neighboring rows.
+        self._shape, self._strides = _layout(self.extents[:-1])
+        size = self._strides[0] * self._shape[0] if self._shape else 1
+        self._rows = [0] * size
+        self._game = None # per-row masks of cells in the game, if not all are
+
+        if board is not None:
+            volume = 1
+            for extent in self.extents: volume *= extent
+            if len(board) != volume:
+                self._game = [0] * size
+            for cell in board:
+                i, bit = self._locate(cell)
+                if board[cell] == live:
+                    self._rows[i] |= bit
+                if self._game is not None:
+                    self._game[i] |= bit
+
+    def __getitem__(self, cell):
+        i, bit = self._locate(cell)
+        return self._rows[i] & bit != 0
+
+    def __setitem__(self, cell, live):
+        i, bit = self._locate(cell)
+        if live:
+            self._rows[i] |= bit
+        else:
+            self._rows[i] &= ~bit
+
+    def __contains__(self, cell):
+        if not self._inside(cell):
+            return False
+        if self._game is None:
+            return True
+        i, bit = self._locate(cell)
+        return self._game[i] & bit != 0
+
+    def __iter__(self):
+        cells = itertools.product(*[range(extent) for extent in self.extents])
+        return cells if self._game is None else (cell for cell in cells if cell in self)
+
+    def __len__(self):
+        if self._game is None:
+            volume = 1
+            for extent in self.extents: volume *= extent
+            return volume
+        return sum(bin(row).count('1') for row in self._game)
+
+    def get(self, cell, default=None):
+        return self[cell] if cell in self else default
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        return (self[cell] for cell in self)
+
+    def items(self):
+        return ((cell, self[cell]) for cell in self)
+
+    def copy(self):
+        board = BitBoard.__new__(BitBoard)
+        board.__dict__.update(self.__dict__)
+        board._rows = list(self._rows)
+        return board
+
+    def population(self):
+        """
+        Gets the number of live cells on the board.
+        """
+        return sum(bin(row).count('1') for row in self._rows)
+
+    def setrun(self, cell, states):
+        """
+        Sets the states of consecutive cells along the last axis, starting
+        at the given cell. Cells not part of the game are left alone.
+        """
+        bits = 0
+        for k, live in enumerate(states):
+            if live:
+                bits |= 1 << k
+        self.setbits(cell, len(states), bits)
+
+    def setbits(self, cell, length, bits):
+        """
+        Sets the states of consecutive cells along the last axis from the
+        bits of an integer, bit k holding the state of the k-th cell from the
+        given cell. Cells not part of the game are left alone; a run reaching
+        beyond the board raises a KeyError.
+        """
+        i, bit = self._locate(cell)
+        x = cell[-1]
+        if x + length > self._width:
+            raise KeyError(cell)
+        run = ((1 << length) - 1) << x
+        if self._game is not None:
+            run &= self._game[i]
+        self._rows[i] = (self._rows[i] & ~run) | (bits << x & run)
+
+    def advance(self, stencil, rules, top):
+        """
+        Advances the board a step, returning the next generation as a new board.
+        :param stencil: Offsets from each cell to its neighbors.
+        :param rules: Next cell state, indexed by [live][live neighbor count].
+        :param top: The highest live neighbor count in the rules.
+        """
+        # Split each offset into a row offset plus a shift along the row.
+        shifts = [(sum(map(mul, o[:-1], self._strides)), o[-1]) for o in stencil]
+        survive = [c for c in range(len(stencil) + 1) if rules[True][min(c, top)]]
+        birth = [c for c in range(len(stencil) + 1) if rules[False][min(c, top)]]
+        full = self._full
+
+        rows = self._rows
+        next_board = BitBoard.__new__(BitBoard)
+        next_board.__dict__.update(self.__dict__)
+        next_board._rows = next_rows = [0] * len(rows)
+
+        for r in self._interior():
+            # Bit planes of the live neighbor count of every cell in the row.
+            planes = []
+            for offset, shift in shifts:
+                row = rows[r + offset]
+                carry = (row >> shift if shift > 0 else row << -shift) & full
+                for k in range(len(planes)):
+                    if not carry:
+                        break
+                    planes[k], carry = planes[k] ^ carry, planes[k] & carry
+                if carry:
+                    planes.append(carry)
+
+            live = rows[r]
+            next_rows[r] = (live & self._counted(planes, survive)) | \
+                           (~live & self._counted(planes, birth) & full)
+            if self._game is not None:
+                next_rows[r] &= self._game[r]
+        return next_board
+
+    def _counted(self, planes, counts):
+        """
+        Gets the mask of cells whose count, held in the given bit planes,
+        is one of the given counts.
+        """
+        mask = 0
+        for c in counts:
+            if c >> len(planes):
+                continue # more than the planes can count
+            match = self._full
+            for k, plane in enumerate(planes):
+                match &= plane if c >> k & 1 else ~plane
+            mask |= match
+        return mask
+
+    def _interior(self):
+        """
+        Gets the indices of all rows which are not part of the border.
+        """
+        if not self._shape:
+            return [0]
+        prefixes = itertools.product(*[range(1, n - 1) for n in self._shape])
+        return [sum(map(mul, prefix, self._strides)) for prefix in prefixes]
+
+    def _locate(self, cell):
+        """
+        Gets the row index and bit mask of a cell, raising a KeyError if it
+        is beyond the board.
+        """
+        # NB: A bit past the row width would be shifted into range, and
+        # counted as a neighbor, when advancing.
+        if not self._inside(cell):
+            raise KeyError(cell)
+        # NB: Row coordinates are offset by one for the border.
+        i = sum(map(mul, cell[:-1], self._strides)) + sum(self._strides)
+        return i, 1 << cell[-1]
+
+    def _inside(self, cell):
+        return len(cell) == len(self.extents) and \
+            all(0 <= c < e for c, e in zip(cell, self.extents))
+
+
+# The cell values of each byte's bits, from the least significant, for Board.setbits.
+_BYTEBITS = [array('b', [b >> k & 1 for k in range(8)]) for b in range(256)]
+
+
+def _layout(extents):
+    """
+    Gets the shape and strides of a flat buffer holding a board of the given
+    extents, surrounded by a one-cell border.
+    """
+    shape = [extent + 2 for extent in extents]
+    strides = [1] * len(shape)
+    for d in range(len(shape) - 2, -1, -1):
+        strides[d] = strides[d + 1] * shape[d + 1]
+    return shape, strides
+
+
+def _runs(shape, strides, lo, hi):
+    """
+    Iterates the (start, stop) offsets of each run of cells along the last
+    axis of a flat bordered board (see _layout), for rows lo (inclusive)
+    through hi (exclusive) along the first axis.
+    """
+    if len(shape) == 1:
+        yield lo + 1, hi + 1
+        return
+    length = shape[-1] - 2
+    for prefix in itertools.product(range(lo + 1, hi + 1), *[range(1, n - 1) for n in shape[1:-1]]):
+        start = sum(map(mul, prefix, strides[:-1])) + 1
+        yield start, start + length
+
+
+def _steprange(src, dst, shape, strides, offsets, rules, top, lo, hi):
+    """
+    Advances cells of a flat bordered board (see _layout) from buffer src into
+    buffer dst, for rows lo (inclusive) through hi (exclusive) along the first
+    axis. Cells hold 1 if live, 0 if dead, or -1 if not part of the game.
+    """
+    for start, stop in _runs(shape, strides, lo, hi):
+        for i in range(start, stop):
+            v = src[i]
+            if v < 0:
+                continue
+            c = [src[i + o] for o in offsets].count(1)
+            dst[i] = rules[v][c if c < top else top]
+
+
+def _shardworker(pipe, buffers, shape, strides, lo, hi):
+    """
+    Advances one slab of a ShardedBoard for each request received, until told
+    to stop.
+    """
+    while True:
+        request = pipe.recv()
+        if request is None:
+            break
+        src, offsets, rules, top = request
+        _steprange(buffers[src], buffers[1 - src], shape, strides, offsets, rules, top, lo, hi)
+        pipe.send(True)
+
+
+def sparse_board(board, live=True):
+    """
+    Converts a dict board into a SparseBoard holding its live cells.
+    :param board: The dict of cells to cell states to convert.
+    :param live: The value used for live state (default True).
+    """
+    return SparseBoard(cell for cell in board if board[cell] == live)
+
+
+def dense_board(board, live=True):
+    """
+    Converts a dict board into an N-dimensional boolean NumPy array, which
+    GameOfLife advances with vectorized operations rather than cell by cell.
+
+    The board must fill a box whose lowest corner is the origin, as
+    random_board output does. Otherwise -- or if NumPy is unavailable, e.g.
+    under Jython -- the board is returned unchanged, so that games simply
+    fall back to stepping the dict.
+
+    :param board: The dict of cells to cell states to convert.
+    :param live: The value used for live state (default True).
+    """
+    if numpy is None or not board:
+        return board
+    axes = list(zip(*board))
+    extents = [max(a) + 1 for a in axes]
+    volume = 1
+    for extent in extents: volume *= extent
+    if min(min(a) for a in axes) < 0 or len(board) != volume:
+        return board
+    array = numpy.zeros(extents, dtype=bool)
+    for cell in board:
+        array[cell] = board[cell] == live
+    return array
+
+
+def dict_board(board):
+    """
+    Converts a board made by dense_board, a Board or a BitBoard back into a
+    dict of cells to True/False. Any other board is returned unchanged.
+    """
+    if isinstance(board, (Board, BitBoard)):
+        return dict(board.items())
+    if numpy is None or not isinstance(board, numpy.ndarray):
+        return board
+    return {cell: bool(board[cell]) for cell in numpy.ndindex(*board.shape)}
+
 
 def random_board(extents, saturation=0.1, live=True, dead=False, seed=None, rng=None):
     """
@@ -251,3 +1259,146 @@ def random_board(extents, saturation=0.1, live=True, dead=False, seed=None, rng=
     for cell in itertools.product(*[range(extent) for extent in extents]):
         board[cell] = live if rng.random() < saturation else dead
     return board
+
+
+def random_chunk(extents, index, chunk=16, saturation=0.1, live=True, dead=False, seed=0):
+    """
+    Generates one chunk of a random board: the cells whose coordinates,
+    divided by the chunk size, equal the chunk's index. Each chunk draws from
+    its own random sequence, seeded by the board's seed and the chunk's index,
+    so any chunk can be regenerated on its own, in any order or in parallel.
+
+    A chunk's cells are drawn all at once, as the bits of a few large random
+    integers, which rounds the saturation to a multiple of 1/65536.
+
+    :param extents: The extents of the whole board.
+    :param index: The chunk's position in the grid of chunks.
+    :param chunk: The chunk size along each axis (default 16).
+    :param saturation: Probability of a cell having the live state (default 0.1, min 0.0, max 1.0).
+    :param live: The value to use for live state (default True).
+    :param dead: The value to use for dead state (default False).
+    :param seed: The random seed of the whole board (default 0).
+    """
+    board = {}
+    for prefix, x, length, bits in _randomruns(extents, index, chunk, saturation, seed):
+        for k in range(length):
+            board[prefix + (x + k,)] = live if bits >> k & 1 else dead
+    return board
+
+
+def random_chunks(extents, chunk=16, saturation=0.1, live=True, dead=False, seed=None):
+    """
+    Generates a random board chunk by chunk (see random_chunk), yielding each
+    chunk's index and dict of cells, so that the whole board never needs to
+    be held in memory at once.
+
+    :param seed: The random seed of the whole board (default None, meaning
+                 a fresh seed drawn from the standard Python RNG).
+    Other parameters are as for random_chunk.
+    """
+    if seed is None: seed = random.getrandbits(64)
+    for index in _chunkindices(extents, chunk):
+        yield index, random_chunk(extents, index, chunk, saturation, live, dead, seed)
+
+
+def fill_random(board, saturation=0.1, seed=None, chunk=16):
+    """
+    Randomizes a board in place, writing each chunk of cells straight into
+    the board. Each chunk is drawn all at once and is deterministic given the
+    seed, whatever order chunks are filled in.
+
+    Board, BitBoard and dict boards get the same cells as random_chunks makes
+    for the same extents, chunk size and seed, their runs written straight
+    from the random bits (see setbits). NumPy arrays (see dense_board) draw each
+    chunk from NumPy's own generator instead, so they get different cells
+    for the same seed. Either way, no board type matches random_board.
+
+    :param board: The board to randomize: a Board, BitBoard, dense_board
+                  array, or dict of cells to True/False.
+    :param saturation: Probability of a cell being live (default 0.1, min 0.0, max 1.0).
+    :param seed: The random seed of the whole board (default None, meaning
+                 a fresh seed drawn from the standard Python RNG).
+    :param chunk: The chunk size along each axis (default 16).
+    """
+    if seed is None: seed = random.getrandbits(64)
+    if numpy is not None and isinstance(board, numpy.ndarray):
+        for index in _chunkindices(board.shape, chunk):
+            h = _chunkseed(seed, index)
+            rng = numpy.random.RandomState([h & 0xffffffff, h >> 32])
+            cells = tuple(slice(i * chunk, (i + 1) * chunk) for i in index)
+            board[cells] = rng.random_sample(board[cells].shape) < saturation
+        return
+    if isinstance(board, (Board, BitBoard)):
+        extents = board.extents
+    else:
+        extents = [max(a) + 1 for a in zip(*board)]
+    for index in _chunkindices(extents, chunk):
+        for prefix, x, length, bits in _randomruns(extents, index, chunk, saturation, seed):
+            if isinstance(board, (Board, BitBoard)):
+                board.setbits(prefix + (x,), length, bits)
+            else:
+                for k in range(length):
+                    cell = prefix + (x + k,)
+                    if cell in board:
+                        board[cell] = bool(bits >> k & 1)
+
+
+def _chunkindices(extents, chunk):
+    """
+    Iterates the indices of the chunks covering a board.
+    """
+    return itertools.product(*[range((extent + chunk - 1) // chunk) for extent in extents])
+
+
+def _chunkseed(seed, index):
+    """
+    Mixes the board's seed with a chunk's index into the chunk's own seed.
+    """
+    h = seed & 0xffffffffffffffff
+    for i in index:
+        h = ((h * 1000003) ^ i) & 0xffffffffffffffff
+    return h
+
+
+def _randomruns(extents, index, chunk, saturation, seed):
+    """
+    Iterates the random runs of cell states along the last axis of a chunk,
+    as (cell coordinates but the last, first last coordinate, run length,
+    states) tuples, the states being the bits of an integer.
+    """
+    rng = random.Random(_chunkseed(seed, index))
+    ranges = [range(i * chunk, min((i + 1) * chunk, extent)) for i, extent in zip(index, extents)]
+    x = ranges[-1][0] if ranges[-1] else 0
+    length = len(ranges[-1])
+    prefixes = list(itertools.product(*ranges[:-1]))
+    bits = _randombits(rng, length * len(prefixes), saturation)
+    run = (1 << length) - 1
+    for prefix in prefixes:
+        yield prefix, x, length, bits & run
+        bits >>= length
+
+
+def _randombits(rng, n, saturation, precision=16):
+    """
+    Draws an integer of n random bits, each set with the given probability,
+    rounded to the given bits of precision. Rather than draw a number per
+    bit, the binary digits of the probability are folded in from the least
+    significant: OR-ing the bits with fair random bits (for a 1 digit) or
+    AND-ing them (for a 0) halves their chance of being unset or set, so each
+    digit costs one getrandbits(n) call over all n bits.
+    """
+    p = int(round(min(max(saturation, 0.0), 1.0) * (1 << precision)))
+    if n == 0 or p == 0:
+        return 0
+    if p == 1 << precision:
+        return (1 << n) - 1
+    while not p & 1:
+        p >>= 1
+        precision -= 1
+    bits = 0
+    for k in range(precision):
+        if p >> k & 1:
+            bits |= rng.getrandbits(n)
+        else:
+            bits &= rng.getrandbits(n)
+    return bits
@@ -1,4 +1,5 @@
 from java.net import URL, URLClassLoader
+from gol import Board
 
 # TODO: Generalize path.
 url = URL('file:///home/curtis/minecraft/python/mcx/mcx.jar')
@@ -11,11 +12,46 @@ except:
 
 def golfast(world, xMin, xMax, yMin, yMax, zMin, zMax,
             max_adjacent_dims=3, birth_min=6, birth_max=6,
-            starvation_max=3, suffocation_min=8):
+            starvation_max=3, suffocation_min=8,
+            max_blocks=0, max_millis=20, parallelism=None):
+    """
+    Creates a GameOfLife3D over the given region of the world.
 
+    Besides stepping synchronously (step), the game can compute each
+    generation off the main thread (startStep), then write its changes a
+    tick at a time (applyChanges), within a budget of blocks and
+    milliseconds per call.
+
+    :param max_blocks: Most blocks written per applyChanges; 0 for no limit.
+    :param max_millis: Most milliseconds spent per applyChanges; 0 for no
+                       limit (default 20, well within a 50 ms tick).
+    :param parallelism: Threads counting slabs of the region in parallel
+                        (default 1, counting serially). The result is the
+                        same either way. Call game.close() when done, to
+                        stop any threads started.
+    """
     if not golFactory:
         print('Sorry, the golfast function is not available.')
         return
-    return golFactory.newInstance(world, xMin, xMax, yMin, yMax, zMin, zMax,
+    game = golFactory.newInstance(world, xMin, xMax, yMin, yMax, zMin, zMax,
                                   max_adjacent_dims, birth_min, birth_max,
                                   starvation_max, suffocation_min)
+    game.setBudget(max_blocks, max_millis)
+    if parallelism is not None:
+        game.setParallelism(parallelism)
+    return game
+
+def golboard(game):
+    """
+    Gets a GameOfLife3D's cell state as a gol.Board, sharing its buffer
+    rather than copying it. Cells are indexed (z, y, x), relative to the
+    region. Call game.snapshot() first to read the world into it, and
+    game.commit() afterward to write any changes back in one pass.
+
+    The board cannot itself be advanced, since its next generation would
+    not reach the buffer; step the game instead, or advance board.copy(),
+    which is detached from the game. Nor may the board be read or written
+    while a game.startStep() is computing, which rewrites the buffer on
+    another thread.
+    """
+    return Board.frombuffer(game.cells(), list(game.extents()))
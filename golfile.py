@@ -0,0 +1,419 @@
+"""
+Compact on-disk snapshots and generation streams for gol boards.
+
+A file starts with a header recording the board's extents and, optionally,
+the rules of the game of life playing on it. Records follow, each a kind
+byte and a payload length, then the payload:
+
+- A keyframe holds every cell's state, run-length encoded in row-major
+  order: each run is a varint of (length << 2 | state), where the state is
+  0 for dead, 1 for live, or 2 for a cell not part of the game.
+
+- A delta holds the cells which toggled in one generation, as varint gaps
+  between their ascending row-major indices.
+
+A snapshot is a file with a single keyframe. A generation stream appends one
+record per step: mostly deltas, plus a keyframe every so often, so that a
+reader need only replay the deltas since the nearest keyframe. Records are
+only ever appended, so a run interrupted mid-write loses at most its last
+generation.
+
+Reading a stream maps the file into memory, where available, and decodes
+only the records needed for the requested generation.
+"""
+
+import bisect, itertools, struct
+
+import gol
+
+try:
+    import mmap
+except ImportError:
+    # NB: mmap is not available under Jython.
+    mmap = None
+
+MAGIC = b'GOLF'
+VERSION = 1
+
+# Cell states within a payload.
+DEAD, LIVE, NOT_IN_GAME = 0, 1, 2
+
+# Record kinds.
+KEYFRAME, DELTA = 0, 1
+
+_HEADER = struct.Struct('<4sBB')
+_EXTENT = struct.Struct('<I')
+_RULES = struct.Struct('<BBBHHHH')
+_RECORD = struct.Struct('<BI')
+
+
+def save(f, board, game=None, extents=None):
+    """
+    Saves a board as a snapshot.
+    :param f: The path or binary file to write.
+    :param board: The board to save: a dict, SparseBoard, Board, BitBoard or
+                  NumPy array. Its cells must have non-negative coordinates.
+    :param game: The game of life whose rules to record (default none).
+    :param extents: The extents to record (default those enclosing the
+                    board's cells). A SparseBoard records only the box from
+                    the origin to these extents.
+    """
+    with _open(f, 'wb') as out:
+        extents, states = _flatten(board, extents)
+        _writeheader(out, extents, game)
+        _writerecord(out, KEYFRAME, _encodestates(states))
+
+
+def load(f):
+    """
+    Loads a snapshot, or the first generation of a stream.
+    :param f: The path or binary file to read.
+    :return: A (game, board) pair: the recorded game of life, or None if no
+             rules were recorded, and a dict of cells to True/False, without
+             the cells which are not part of the game.
+    """
+    # NB: Read only the header and the first record, not a whole stream.
+    with _open(f, 'rb') as src:
+        head = bytearray(src.read(_HEADER.size))
+        if len(head) == _HEADER.size:
+            head += src.read(head[-1] * _EXTENT.size + _RULES.size)
+        extents, game, pos = _readheader(head)
+        record = src.read(_RECORD.size)
+        if len(record) < _RECORD.size:
+            raise Exception("Expected a keyframe")
+        kind, size = _RECORD.unpack(record)
+        if kind != KEYFRAME:
+            raise Exception("Expected a keyframe")
+        data = bytearray(src.read(size))
+    return game, _unflatten(extents, _decodestates(data, _volume(extents)))
+
+
+class GenerationWriter(object):
+    """
+    Records a run of a game as a stream of generations, appending one record
+    per step. Use as a context manager, or call close when done.
+
+    The extents are fixed by the first generation, and every later change
+    must lie within them. Since a SparseBoard's live cells may wander off
+    without bound, give it extents enough to hold the whole run.
+    """
+
+    def __init__(self, f, board, game=None, keyframe=64, extents=None):
+        """
+        :param f: The path or binary file to write.
+        :param board: The first generation's board (see save).
+        :param game: The game of life whose rules to record (default none).
+        :param keyframe: Generations between keyframes; 0 for only the first
+                         (default 64).
+        :param extents: The extents to record (see save).
+        """
+        self._file = _open(f, 'wb')
+        self.extents, self._states = _flatten(board, extents)
+        self._strides = _strides(self.extents)
+        self.keyframe = keyframe
+        self.generations = 1
+        _writeheader(self._file, self.extents, game)
+        _writerecord(self._file, KEYFRAME, _encodestates(self._states))
+
+    def append(self, changes):
+        """
+        Appends the next generation.
+        :param changes: The cells which changed state since the previous
+                        generation, e.g. the (cell, old, new) triples of a
+                        game started with diffs=True; or just the cells.
+        """
+        indices = []
+        for change in changes:
+            cell = change[0] if len(change) == 3 and isinstance(change[0], tuple) else change
+            if len(cell) != len(self.extents) or \
+               not all(0 <= c < e for c, e in zip(cell, self.extents)):
+                raise Exception("Cell %s is outside the recorded extents %s" % (cell, self.extents))
+            i = sum(c * s for c, s in zip(cell, self._strides))
+            if self._states[i] == NOT_IN_GAME:
+                raise Exception("Cell %s is not part of the game" % (cell,))
+            self._states[i] ^= 1
+            indices.append(i)
+        if self.keyframe and self.generations % self.keyframe == 0:
+            _writerecord(self._file, KEYFRAME, _encodestates(self._states))
+        else:
+            _writerecord(self._file, DELTA, _encodeindices(sorted(indices)))
+        self.generations += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class GenerationReader(object):
+    """
+    Reads any generation of a recorded stream, decoding only the records
+    since the nearest keyframe before it. Use as a context manager, or call
+    close when done.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: The path of the stream (or snapshot) to read.
+        """
+        self._file = open(path, 'rb')
+        if mmap is not None:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._data = None
+        head = self._read(0, _HEADER.size + 255 * _EXTENT.size + _RULES.size)
+        self.extents, self.game, pos = _readheader(head)
+
+        # Index the records by skipping over their payloads. A truncated
+        # final record, from an interrupted run, is ignored.
+        self._records = [] # (kind, payload offset, payload size) per generation
+        self._keyframes = [] # generations holding keyframes
+        end = self._size()
+        while pos + _RECORD.size <= end:
+            kind, size = _RECORD.unpack(bytes(self._read(pos, _RECORD.size)))
+            pos += _RECORD.size
+            if pos + size > end:
+                break
+            if kind == KEYFRAME:
+                self._keyframes.append(len(self._records))
+            self._records.append((kind, pos, size))
+            pos += size
+        if not self._keyframes or self._keyframes[0] != 0:
+            raise Exception("Stream does not start with a keyframe")
+
+    def __len__(self):
+        return len(self._records)
+
+    def board(self, generation):
+        """
+        Gets a generation's board, as a dict of cells to True/False without
+        the cells which are not part of the game.
+        :param generation: The generation, from 0 to len(self) - 1.
+        """
+        return _unflatten(self.extents, self.states(generation))
+
+    def states(self, generation):
+        """
+        Gets a generation's cell states, as a bytearray of DEAD, LIVE and
+        NOT_IN_GAME values in row-major order.
+        :param generation: The generation, from 0 to len(self) - 1.
+        """
+        if not 0 <= generation < len(self._records):
+            raise Exception("No generation %d in a stream of %d" % (generation, len(self._records)))
+        start = self._keyframes[bisect.bisect_right(self._keyframes, generation) - 1]
+        kind, pos, size = self._records[start]
+        states = _decodestates(self._read(pos, size), _volume(self.extents))
+        for kind, pos, size in self._records[start + 1:generation + 1]:
+            for i in _decodeindices(self._read(pos, size)):
+                states[i] ^= 1
+        return states
+
+    def close(self):
+        if self._data is not None:
+            self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _read(self, pos, size):
+        if self._data is not None:
+            return bytearray(self._data[pos:pos + size])
+        self._file.seek(pos)
+        return bytearray(self._file.read(size))
+
+    def _size(self):
+        if self._data is not None:
+            return len(self._data)
+        self._file.seek(0, 2)
+        return self._file.tell()
+
+
+class _open(object):
+    """
+    Opens a path, or passes an open file through without closing it.
+    """
+
+    def __init__(self, f, mode):
+        self.owned = not hasattr(f, 'read' if 'r' in mode else 'write')
+        self.file = open(f, mode) if self.owned else f
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+    def close(self):
+        if self.owned:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _writeheader(out, extents, game):
+    out.write(_HEADER.pack(MAGIC, VERSION, len(extents)))
+    for extent in extents:
+        out.write(_EXTENT.pack(extent))
+    if game is None:
+        out.write(_RULES.pack(0, 0, 0, 0, 0, 0, 0))
+        return
+    if not isinstance(game, gol.GameOfLife):
+        raise Exception("Only the rules of a GameOfLife can be recorded")
+    out.write(_RULES.pack(1, game.max_adjacent_dims or 0, game.radius,
+                          game.isolation_threshold, game.birth_min,
+                          game.birth_max, game.overcrowding_threshold))
+
+
+def _readheader(data):
+    """
+    Parses a header, returning the extents, game and the offset past it.
+    """
+    magic, version, dim = _HEADER.unpack_from(bytes(data[:_HEADER.size]))
+    if magic != MAGIC:
+        raise Exception("Not a gol file")
+    if version != VERSION:
+        raise Exception("Unsupported gol file version: %d" % version)
+    pos = _HEADER.size
+    extents = []
+    for d in range(dim):
+        extents.append(_EXTENT.unpack_from(bytes(data[pos:pos + _EXTENT.size]))[0])
+        pos += _EXTENT.size
+    recorded, adjacent, radius, isolation, birth_min, birth_max, overcrowding = \
+        _RULES.unpack_from(bytes(data[pos:pos + _RULES.size]))
+    pos += _RULES.size
+    game = None
+    if recorded:
+        if adjacent:
+            game = gol.GameOfLife(adjacent, isolation, birth_min, birth_max, overcrowding)
+        else:
+            game = gol.LargerThanLife(radius, isolation, birth_min, birth_max, overcrowding)
+    return extents, game, pos
+
+
+def _writerecord(out, kind, payload):
+    out.write(_RECORD.pack(kind, len(payload)))
+    out.write(payload)
+
+
+def _flatten(board, extents=None):
+    """
+    Gets a board's extents (unless given), and its cell states as a bytearray
+    in row-major order. Cells within the extents but missing from a dict
+    board are not part of the game; a sparse board's missing cells are dead.
+    """
+    board = gol.dict_board(board)
+    sparse = isinstance(board, gol.SparseBoard)
+    cells = list(board)
+    if cells and min(min(a) for a in zip(*cells)) < 0:
+        raise Exception("Cells must have non-negative coordinates")
+    if extents is None:
+        extents = [max(a) + 1 for a in zip(*cells)] if cells else []
+    else:
+        extents = list(extents)
+        for cell in cells:
+            if len(cell) != len(extents) or not all(c < e for c, e in zip(cell, extents)):
+                raise Exception("Cell %s is outside the extents %s" % (cell, extents))
+    strides = _strides(extents)
+    states = bytearray([DEAD if sparse else NOT_IN_GAME]) * _volume(extents)
+    for cell in cells:
+        states[sum(c * s for c, s in zip(cell, strides))] = LIVE if board[cell] else DEAD
+    return extents, states
+
+
+def _unflatten(extents, states):
+    strides = _strides(extents)
+    board = {}
+    for cell in _cells(extents):
+        state = states[sum(c * s for c, s in zip(cell, strides))]
+        if state != NOT_IN_GAME:
+            board[cell] = state == LIVE
+    return board
+
+
+def _cells(extents):
+    return itertools.product(*[range(extent) for extent in extents])
+
+
+def _strides(extents):
+    strides = [1] * len(extents)
+    for d in range(len(extents) - 2, -1, -1):
+        strides[d] = strides[d + 1] * extents[d + 1]
+    return strides
+
+
+def _volume(extents):
+    volume = 1 if extents else 0
+    for extent in extents: volume *= extent
+    return volume
+
+
+def _writevarint(out, n):
+    while n >= 0x80:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _varints(data):
+    n = shift = 0
+    for byte in data:
+        n |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            yield n
+            n = shift = 0
+
+
+def _encodestates(states):
+    out = bytearray()
+    i, size = 0, len(states)
+    while i < size:
+        state = states[i]
+        j = i + 1
+        while j < size and states[j] == state:
+            j += 1
+        _writevarint(out, (j - i) << 2 | state)
+        i = j
+    return out
+
+
+def _decodestates(data, size):
+    states = bytearray(size)
+    i = 0
+    for run in _varints(data):
+        length = run >> 2
+        if run & 3:
+            states[i:i + length] = bytearray([run & 3]) * length
+        i += length
+    if i != size:
+        raise Exception("Corrupt keyframe: %d of %d cells" % (i, size))
+    return states
+
+
+def _encodeindices(indices):
+    out = bytearray()
+    previous = 0
+    for i in indices:
+        _writevarint(out, i - previous)
+        previous = i
+    return out
+
+
+def _decodeindices(data):
+    i = 0
+    for gap in _varints(data):
+        i += gap
+        yield i
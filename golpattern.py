@@ -0,0 +1,307 @@
+"""
+Streaming readers for standard Life pattern formats: RLE (.rle) and
+plaintext (.cells).
+
+A pattern is read a line at a time and yields its live cells as runs along
+its rows, which are written straight into a gol board -- or a GameOfLife3D
+region -- without building the whole pattern in memory first.
+"""
+
+import re
+from array import array
+
+import gol
+
+try:
+    basestring
+except NameError:
+    # NB: For Python 3, whose str covers unicode paths.
+    basestring = str
+
+# Runs of live cells are sent to a GameOfLife3D in batches of this many.
+BATCH = 1024
+
+_RLE_HEADER = re.compile(r'\s*x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)(?:\s*,\s*rule\s*=\s*(\S+))?')
+
+
+class Pattern(object):
+    """
+    A Life pattern being read from a file. Its header -- name, comments,
+    size and rule, where given -- is read up front; its live cells are
+    read only as they are iterated, as (column, row, length) runs.
+
+    A pattern can be iterated only once. A file opened from a path is
+    closed once the runs are all read; use the pattern as a context manager,
+    or call close, to close it sooner.
+    """
+
+    def __init__(self, f, format=None):
+        """
+        :param f: The path, open text file or iterable of lines to read.
+        :param format: 'rle' or 'plaintext' (default inferred from the
+                       header, else from the file name, else 'rle').
+        """
+        # NB: Paths from Java strings are unicode under Jython.
+        self._file = open(f) if isinstance(f, basestring) else None
+        self._lines = iter(self._file or f)
+        self.name = None
+        self.comments = []
+        self.width = self.height = None
+        self.rule = None
+
+        try:
+            format = self._readheader(format)
+            if format is None and isinstance(f, basestring):
+                format = 'plaintext' if f.lower().endswith(('.cells', '.txt')) else 'rle'
+            format = format or 'rle' # e.g. a headerless RLE body
+            if format not in ('rle', 'plaintext'):
+                raise Exception("Unknown pattern format: %s" % format)
+        except:
+            self.close()
+            raise
+        self.format = format
+
+    def _readheader(self, format):
+        """
+        Reads comment lines up to the first line of cells, returning the
+        format they imply, if any.
+        """
+        self._first = None
+        for line in self._lines:
+            line = line.strip()
+            if line.startswith('#'):
+                format = format or 'rle'
+                if line[1:2] == 'N':
+                    self.name = line[2:].strip()
+                elif line[1:2] in ('C', 'c'):
+                    self.comments.append(line[2:].strip())
+            elif line.startswith('!'):
+                format = format or 'plaintext'
+                if line.startswith('!Name:'):
+                    self.name = line[6:].strip()
+                else:
+                    self.comments.append(line[1:].strip())
+            elif _RLE_HEADER.match(line) and format != 'plaintext':
+                format = 'rle'
+                m = _RLE_HEADER.match(line)
+                self.width, self.height = int(m.group(1)), int(m.group(2))
+                self.rule = m.group(3)
+                break
+            elif line or format == 'plaintext':
+                self._first = line
+                break
+        return format
+
+    def __iter__(self):
+        """
+        Iterates the runs of live cells, as (column, row, length) triples.
+        """
+        lines = self._lines
+        if self._first is not None:
+            lines = _chain(self._first, lines)
+        runs = _rleruns(lines) if self.format == 'rle' else _plaintextruns(lines)
+        try:
+            for run in runs:
+                yield run
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Closes the file opened from the pattern's path, if any.
+        """
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def cells(self):
+        """
+        Iterates the live cells, as (column, row) pairs.
+        """
+        for x, y, length in self:
+            for i in range(length):
+                yield x + i, y
+
+    def game(self, max_adjacent_dims=2):
+        """
+        Gets a GameOfLife playing the pattern's rule, in B/S notation (e.g.
+        B3/S23, or the older 23/3). The birth and survival neighbor counts
+        must each form a single range. Without a rule, Conway's is assumed.
+        :param max_adjacent_dims: Passed to the GameOfLife.
+        """
+        birth, survival = [3], [2, 3]
+        if self.rule:
+            rule = self.rule.upper()
+            m = re.match(r'B(\d*)/S(\d*)$', rule)
+            if m:
+                birth, survival = m.groups()
+            else:
+                m = re.match(r'S(\d*)/B(\d*)$', rule) or re.match(r'(\d*)/(\d*)$', rule)
+                if not m:
+                    raise Exception("Unsupported rule: %s" % self.rule)
+                survival, birth = m.groups()
+            birth = sorted(int(c) for c in birth)
+            survival = sorted(int(c) for c in survival)
+            for counts in (birth, survival):
+                if not counts or counts != list(range(counts[0], counts[-1] + 1)):
+                    raise Exception("Unsupported rule: %s" % self.rule)
+        # NB: GameOfLife counts include the cell itself, so survival shifts by one.
+        return gol.GameOfLife(max_adjacent_dims, isolation_threshold=survival[0],
+                              birth_min=birth[0], birth_max=birth[-1],
+                              overcrowding_threshold=survival[-1] + 2)
+
+
+def fill(board, pattern, corner=None):
+    """
+    Writes a pattern's live cells into a gol board. Columns of the pattern
+    run along the board's last axis and rows along the axis before it.
+    Cells which the pattern leaves dead are left alone.
+
+    Compact boards are written a run at a time; dict boards gain any cells
+    the pattern covers. Runs are clipped to the extents of a compact or
+    NumPy board, so a pattern may hang over its edges.
+
+    :param board: The board to write: a dict, SparseBoard, Board, BitBoard or
+                  NumPy array.
+    :param pattern: The Pattern (or path or file to read as one).
+    :param corner: The cell at which to place the pattern's top left corner
+                   (default the origin of a 2D board).
+    :return: The board.
+    """
+    if not isinstance(pattern, Pattern):
+        pattern = Pattern(pattern)
+    if corner is None:
+        corner = (0, 0)
+    lead, (r0, c0) = tuple(corner[:-2]), corner[-2:]
+    dense = gol.numpy is not None and isinstance(board, gol.numpy.ndarray)
+    extents = board.shape if dense else getattr(board, 'extents', None)
+    setrun = getattr(board, 'setrun', None)
+    for x, y, length in pattern:
+        cell = lead + (r0 + y, c0 + x)
+        if extents is not None:
+            cell, length = _clip(cell, length, extents)
+            if length <= 0:
+                continue
+        if setrun is not None:
+            setrun(cell, [True] * length)
+        elif dense:
+            board[cell[:-1] + (slice(cell[-1], cell[-1] + length),)] = True
+        else:
+            for i in range(length):
+                board[cell[:-1] + (cell[-1] + i,)] = True
+    return board
+
+
+def sparse(pattern):
+    """
+    Reads a pattern into a new SparseBoard of (row, column) cells.
+    :param pattern: The Pattern (or path or file to read as one).
+    """
+    return fill(gol.SparseBoard(), pattern)
+
+
+def place(game3d, pattern, x=0, y=0, z=0):
+    """
+    Writes a pattern's live cells into the region of a GameOfLife3D (see
+    golfast), in batches of runs. Columns of the pattern run along +x, and
+    rows down along -y, from its top left corner at (x, y, z), relative to
+    the region. Runs are clipped to the region, and blocks not part of the
+    game are left alone.
+
+    Raises an error, writing nothing, if the game is busy with a step (see
+    GameOfLife3D.setRuns); try again once its changes are applied.
+    :param game3d: The GameOfLife3D instance.
+    :param pattern: The Pattern (or path or file to read as one).
+    """
+    if not isinstance(pattern, Pattern):
+        pattern = Pattern(pattern)
+    runs = array('i')
+    first = True
+    for px, py, length in pattern:
+        runs.extend((x + px, y - py, z, length))
+        if len(runs) >= 4 * BATCH:
+            _setruns(game3d, runs, first)
+            runs = array('i')
+            first = False
+    if runs or first:
+        _setruns(game3d, runs, first)
+
+
+def _setruns(game3d, runs, first):
+    # NB: Once the first batch is in, no step can start before the rest,
+    # since both run on the main thread.
+    if not game3d.setRuns(runs) and first:
+        raise Exception("The game is busy with a step; try again once it is applied")
+
+
+def _clip(cell, length, extents):
+    """
+    Clips a run of cells along the last axis to a board's extents, returning
+    its first cell and length: a length of 0 if none of it is on the board.
+    """
+    if len(cell) != len(extents) or \
+       not all(0 <= c < e for c, e in zip(cell[:-1], extents[:-1])):
+        return cell, 0
+    start, stop = max(cell[-1], 0), min(cell[-1] + length, extents[-1])
+    return cell[:-1] + (start,), stop - start
+
+
+def _chain(first, lines):
+    yield first
+    for line in lines:
+        yield line
+
+
+def _rleruns(lines):
+    """
+    Parses the body of an RLE pattern, yielding runs of live cells. Any
+    cell state other than b (dead) counts as live.
+    """
+    x = y = 0
+    count = 0
+    for line in lines:
+        if line.startswith('#'):
+            continue
+        for ch in line:
+            if ch.isdigit():
+                count = count * 10 + ord(ch) - 48
+                continue
+            n = count or 1
+            count = 0
+            if ch == 'b' or ch == '.':
+                x += n
+            elif ch == '$':
+                x = 0
+                y += n
+            elif ch == '!':
+                return
+            elif ch.isalpha():
+                yield x, y, n
+                x += n
+            # Whitespace (and anything else) between tokens is ignored.
+
+
+def _plaintextruns(lines):
+    """
+    Parses the body of a plaintext pattern, yielding runs of live cells.
+    """
+    y = 0
+    for line in lines:
+        if line.startswith('!'):
+            continue
+        start = None
+        for x, ch in enumerate(line.rstrip('\r\n')):
+            live = ch == 'O' or ch == '*'
+            if live and start is None:
+                start = x
+            elif not live and start is not None:
+                yield start, y, x - start
+                start = None
+        if start is not None:
+            yield start, y, len(line.rstrip('\r\n')) - start
+        y += 1
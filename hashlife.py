@@ -0,0 +1,270 @@
+"""
+HashLife: advances a Game of Life by many generations at once.
+
+The board is stored as a tree of nodes -- a quadtree in 2D, an octree in 3D,
+and so on -- where each node of level k covers a cube of 2^k cells per side.
+Nodes are canonicalized, so equal regions of the board share a single node,
+and each node memoizes the future of its center. Regular patterns thereby
+advance exponentially many generations for the cost of a few lookups.
+
+Like a SparseBoard, a HashLife board spans all of Z^n, without edges.
+"""
+
+import itertools
+from collections import OrderedDict
+
+from gol import SparseBoard
+
+
+class Node(object):
+    """
+    A canonical node of the tree: either a single cell (level 0), or
+    2^dim child nodes of the next level down.
+    """
+
+    __slots__ = ('level', 'children', 'population', 'results')
+
+    def __init__(self, level, children, population):
+        self.level = level
+        self.children = children
+        self.population = population
+        self.results = {} # generation step exponent -> future center node
+
+
+class HashLife(object):
+    """
+    A HashLife engine for a ZnBoardGame with life rules, such as GameOfLife.
+
+    Canonical nodes are kept in a least-recently-used table of bounded size.
+    When a node is evicted from the table, its memoized futures are dropped
+    too, so memory stays capped even during very long runs.
+    """
+
+    def __init__(self, game, board, dim=None, max_nodes=1000000):
+        """
+        :param game: The game whose rules to apply, e.g. a GameOfLife.
+        :param board: The starting board: a dict of cells to states, or a
+                      SparseBoard. Cells beyond the board are dead.
+        :param dim: The dimensionality of the board (default inferred from
+                    its cells; required if the board has no cells).
+        :param max_nodes: Maximum number of canonical nodes to keep cached
+                          (default 1000000).
+        """
+        cells = [cell for cell in board if board[cell] == True]
+        if dim is None:
+            if not board:
+                raise Exception("Cannot infer dimensionality of an empty board")
+            dim = len(next(iter(board)))
+        self.game = game
+        self.dim = dim
+        self.max_nodes = max_nodes
+        self.generation = 0
+
+        origin = (0,) * dim
+        # NB: The base case and padding assume signals travel one cell per generation.
+        if getattr(game, 'radius', 1) != 1:
+            raise Exception("HashLife needs neighborhoods of radius 1, not %s" % game.radius)
+        if game.nextcellstate(game.neighbors(SparseBoard(), origin), origin):
+            raise Exception("Rules give birth in empty space; HashLife needs them not to")
+
+        # Child nodes are ordered by which half of each axis they occupy.
+        self._halves = list(itertools.product((0, 1), repeat=dim))
+        self._nodes = OrderedDict() # children -> canonical node, in LRU order
+        self._empties = [Node(0, None, 0)]
+        self._live = Node(0, None, 1)
+
+        # Build the smallest tree enclosing all live cells.
+        lo = tuple(min(a) for a in zip(*cells)) if cells else origin
+        hi = tuple(max(a) for a in zip(*cells)) if cells else origin
+        level = 2
+        while 1 << level <= max(h - l for l, h in zip(lo, hi)):
+            level += 1
+        self.origin = lo
+        self.root = self._build(level, lo, cells)
+
+    @property
+    def population(self):
+        """The number of live cells on the board."""
+        return self.root.population
+
+    def advance(self, n=1):
+        """
+        Advances the board by n generations, in powers of two.
+        """
+        j = 0
+        while n:
+            if n & 1:
+                self._advance(j)
+            n >>= 1
+            j += 1
+
+    def board(self):
+        """
+        Gets the board's current live cells, as a SparseBoard.
+        """
+        board = SparseBoard()
+        self._collect(self.root, self.origin, board.cells)
+        return board
+
+    def _advance(self, j):
+        """
+        Advances the board by 2^j generations.
+        """
+        # Pad the root with empty space until it is big enough to advance
+        # 2^j generations, and no live cell can travel beyond its center.
+        while self.root.level < j + 3 or \
+                self._center(self._center(self.root)).population != self.root.population:
+            self._expand()
+        quarter = 1 << (self.root.level - 2)
+        self.root = self._step(self.root, j)
+        self.origin = tuple(o + quarter for o in self.origin)
+        self.generation += 1 << j
+
+    def _expand(self):
+        """
+        Surrounds the root with empty space, keeping it centered.
+        """
+        level = self.root.level
+        empty = self._empty(level - 1)
+        children = []
+        for h in self._halves:
+            # Each child of the root moves into the opposite corner of a new node.
+            corner = self._index([1 - b for b in h])
+            children.append(self._node([self.root.children[self._index(h)] if i == corner else empty
+                                        for i in range(len(self._halves))]))
+        self.root = self._node(children)
+        half = 1 << (level - 1)
+        self.origin = tuple(o - half for o in self.origin)
+
+    def _step(self, node, j):
+        """
+        Gets the center of a node (one level down), advanced 2^j generations.
+        The node's level must be at least j + 2.
+        """
+        result = node.results.get(j)
+        if result is not None:
+            return result
+        level = node.level
+        if node.population == 0:
+            result = self._empty(level - 1)
+        elif level == 2:
+            result = self._base(node)
+        else:
+            # Overlapping nodes, one level down, at every half-child offset.
+            offsets = list(itertools.product(range(3), repeat=self.dim))
+            if j == level - 2:
+                # Advance halfway now, and the rest of the way below.
+                inner = {o: self._step(self._subnode(node, o), level - 3) for o in offsets}
+                rest = level - 3
+            else:
+                inner = {o: self._center(self._subnode(node, o)) for o in offsets}
+                rest = j
+            result = self._node([self._step(self._node([inner[tuple(a + b for a, b in zip(h, e))]
+                                                        for e in self._halves]), rest)
+                                 for h in self._halves])
+        node.results[j] = result
+        return result
+
+    def _base(self, node):
+        """
+        Advances the center of a level-2 node one generation,
+        by applying the game's rules directly.
+        """
+        board = {}
+        self._cells(node, (0,) * self.dim, board)
+        leaves = []
+        for h in self._halves:
+            cell = tuple(1 + b for b in h)
+            live = self.game.nextcellstate(self.game.neighbors(board, cell), cell)
+            leaves.append(self._live if live else self._empties[0])
+        return self._node(leaves)
+
+    def _node(self, children):
+        """
+        Gets the canonical node with the given children.
+        """
+        key = tuple(children)
+        node = self._nodes.pop(key, None)
+        if node is None:
+            node = Node(key[0].level + 1, key, sum(c.population for c in key))
+            if len(self._nodes) >= self.max_nodes:
+                # Evict the least recently used node, with its memoized futures.
+                evicted = self._nodes.popitem(last=False)[1]
+                evicted.results.clear()
+        self._nodes[key] = node # mark as most recently used
+        return node
+
+    def _empty(self, level):
+        """
+        Gets the empty node of the given level.
+        """
+        while len(self._empties) <= level:
+            self._empties.append(self._node([self._empties[-1]] * len(self._halves)))
+        return self._empties[level]
+
+    def _index(self, h):
+        """
+        Gets the index of the child occupying the given halves of each axis.
+        """
+        i = 0
+        for b in h:
+            i = (i << 1) | b
+        return i
+
+    def _subnode(self, node, offset):
+        """
+        Gets the node one level down whose lowest corner lies at the given
+        offset within the node, in units of half a child.
+        """
+        children = []
+        for e in self._halves:
+            g = [o + b for o, b in zip(offset, e)]
+            child = node.children[self._index([x >> 1 for x in g])]
+            children.append(child.children[self._index([x & 1 for x in g])])
+        return self._node(children)
+
+    def _center(self, node):
+        """
+        Gets the node one level down lying at the center of the given node.
+        """
+        return self._subnode(node, (1,) * self.dim)
+
+    def _build(self, level, corner, cells):
+        """
+        Builds the node of the given level whose lowest corner is at the given
+        cell, containing the given live cells.
+        """
+        if not cells:
+            return self._empty(level)
+        if level == 0:
+            return self._live
+        half = 1 << (level - 1)
+        parts = [[] for h in self._halves]
+        for cell in cells:
+            parts[self._index([int(c - o >= half) for c, o in zip(cell, corner)])].append(cell)
+        return self._node([self._build(level - 1, tuple(o + b * half for o, b in zip(corner, h)), part)
+                           for h, part in zip(self._halves, parts)])
+
+    def _cells(self, node, corner, board):
+        """
+        Records the states of all cells of a node into a dict board.
+        """
+        if node.level == 0:
+            board[corner] = node.population == 1
+            return
+        half = 1 << (node.level - 1)
+        for h, child in zip(self._halves, node.children):
+            self._cells(child, tuple(o + b * half for o, b in zip(corner, h)), board)
+
+    def _collect(self, node, corner, cells):
+        """
+        Records the live cells of a node into a set.
+        """
+        if node.population == 0:
+            return
+        if node.level == 0:
+            cells.add(corner)
+            return
+        half = 1 << (node.level - 1)
+        for h, child in zip(self._halves, node.children):
+            self._collect(child, tuple(o + b * half for o, b in zip(corner, h)), cells)
@@ -1,3 +1,16 @@
+import java.nio.ByteBuffer;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.List;
+import java.util.concurrent.Callable;
+import java.util.concurrent.ExecutionException;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.ForkJoinPool;
+import java.util.concurrent.Future;
+import java.util.concurrent.atomic.AtomicBoolean;
+
+import org.bukkit.ChunkSnapshot;
 import org.bukkit.Material;
 import org.bukkit.World;
 import org.bukkit.block.Block;
@@ -6,19 +19,106 @@ public class GameOfLife3D {
   private static final Material LIVE = Material.SLIME_BLOCK;
   private static final Material DEAD = Material.AIR;
 
+  /** Cell values of the region snapshot. */
+  private static final byte LIVE_CELL = 1, DEAD_CELL = 0, NOT_IN_GAME = -1;
+
+  /** Tiles are cubes of 2^TILE_BITS cells per side. */
+  private static final int TILE_BITS = 3, TILE = 1 << TILE_BITS;
+
+  /** Material written for each cell value in the game, indexed by value. */
+  private static final Material[] PALETTE = {DEAD, LIVE};
+
+  /** Thread computing generations off the server main thread. */
+  private static final ExecutorService EXECUTOR = Executors.newSingleThreadExecutor(r -> {
+    final Thread t = new Thread(r, "GameOfLife3D");
+    t.setDaemon(true);
+    return t;
+  });
+
   private final World w;
 
   private final int xMin, yMin, zMin;
   private final int xMax, yMax, zMax;
   private final int xLen, yLen, zLen;
 
-  private int maxAdjacentDims;
-  private int birthMin, birthMax;
-  private int starvationMax;
-  private int suffocationMin;
+  // NB: Volatile, since the rules may be set while a step is computing.
+  private volatile int maxAdjacentDims;
+  private volatile int birthMin, birthMax;
+  private volatile int starvationMax;
+  private volatile int suffocationMin;
+
+  /**
+   * Snapshot of the region's cells, read once per step: a flat grid with a
+   * one-cell border, indexed by (x+1) + (y+1)*yStride + (z+1)*zStride. The
+   * border holds the blocks just outside the region, live or dead, so live
+   * blocks next to the region count as neighbors, as they always have; the
+   * game never changes them.
+   */
+  private final byte[] cells;
+  private final int yStride, zStride;
+
+  /**
+   * The snapshot as read, before any generations were computed into cells;
+   * the changes to write are the differences between the two.
+   */
+  private final byte[] before;
+
+  /**
+   * Running sums of live cells over the snapshot: along x (3 cells), then
+   * over those along y (3x3 cells). Summing the latter along z gives the
+   * live count of each cell's 3x3x3 box, in a handful of adds per cell.
+   */
+  private final int[] xSums, xySums;
 
-  /** Buffer storing the next game state, reused for each step. */
-  private final Material[][][] next;
+  /**
+   * Offsets from a cell's index in the snapshot to its neighbors: the cells
+   * adjacent along at most maxAdjacentDims axes. Built by setRules.
+   */
+  private volatile int[] stencil;
+
+  /**
+   * Buffer storing the next game state, reused for each step: cell values
+   * laid out like the snapshot, so a step is one flat pass per generation.
+   */
+  private final byte[] next;
+
+  /**
+   * Blocks changed by the last computed step: each entry is the block's
+   * index in the region, x + xLen*(y + yLen*z), shifted left by one, with
+   * the low bit set if it becomes live. Entries before applied are done.
+   */
+  private final int[] changes;
+  private int changeCount, applied;
+
+  /**
+   * The region is partitioned into tiles of TILE^3 cells. A tile is dirty if
+   * any of its cells changed in the last generation, or differed from the
+   * cells when last read; a tile is active if it or a neighboring tile is
+   * dirty. Only active tiles can change, so dormant tiles are skipped when
+   * computing, and tiles untouched by any generation are skipped when
+   * listing changes. (A dormant tile's neighborhood is as it was last
+   * generation, so under the same rules its cells stay as they are.)
+   */
+  private final int xTiles, yTiles, zTiles;
+  private final boolean[] dirty, active, touched;
+  private final AtomicBoolean rulesChanged = new AtomicBoolean();
+
+  /** The step computing off the main thread, if any. */
+  private Future<?> pending;
+
+  /**
+   * Pool counting slabs of z planes in parallel, or null to count serially,
+   * as by default: a small region gains little, and the threads would
+   * compete with the server's own.
+   * Each cell's next state depends only on the snapshot, so the result is
+   * the same for any parallelism.
+   */
+  private ForkJoinPool pool;
+  private int parallelism = 1;
+
+  /** Limits on the blocks written per applyChanges call; 0 for none. */
+  private int maxBlocks;
+  private long maxMillis;
 
   public GameOfLife3D(World w, int xMin, int xMax, int yMin, int yMax, int zMin, int zMax,
     int maxAdjacentDims, int birthMin, int birthMax, int starvationMax, int suffocationMin)
@@ -27,16 +127,73 @@ public class GameOfLife3D {
     this.xMin = xMin; this.xMax = xMax; xLen = xMax - xMin + 1;
     this.yMin = yMin; this.yMax = yMax; yLen = yMax - yMin + 1;
     this.zMin = zMin; this.zMax = zMax; zLen = zMax - zMin + 1;
+    changes = new int[xLen * yLen * zLen];
+
+    yStride = xLen + 2;
+    zStride = yStride * (yLen + 2);
+    cells = new byte[zStride * (zLen + 2)];
+    before = new byte[cells.length];
+    next = new byte[cells.length];
+    xSums = new int[cells.length];
+    xySums = new int[cells.length];
+
+    xTiles = (xLen + TILE - 1) >> TILE_BITS;
+    yTiles = (yLen + TILE - 1) >> TILE_BITS;
+    zTiles = (zLen + TILE - 1) >> TILE_BITS;
+    dirty = new boolean[xTiles * yTiles * zTiles];
+    active = new boolean[dirty.length];
+    touched = new boolean[dirty.length];
+    Arrays.fill(dirty, true);
     setRules(maxAdjacentDims, birthMin, birthMax, starvationMax, suffocationMin);
-    next = new Material[xLen][yLen][zLen];
+  }
+
+  /**
+   * Sets how many threads count slabs of the region in parallel; 1 to count
+   * serially, as by default. Call close when done with the game, to stop
+   * any threads started.
+   */
+  public void setParallelism(int parallelism) {
+    discard();
+    if (pool != null) pool.shutdown();
+    this.parallelism = Math.max(1, parallelism);
+    pool = this.parallelism > 1 ? new ForkJoinPool(this.parallelism) : null;
+  }
+
+  /** Abandons any computing generation and stops the parallel threads, if any. */
+  public void close() {
+    setParallelism(1);
   }
 
   public void setRules(int maxAdjacentDims, int birthMin, int birthMax, int starvationMax, int suffocationMin) {
+    final boolean rebuild = stencil == null || maxAdjacentDims != this.maxAdjacentDims;
+    final boolean changed = rebuild || birthMin != this.birthMin || birthMax != this.birthMax ||
+      starvationMax != this.starvationMax || suffocationMin != this.suffocationMin;
+    // NB: The game timer sets the rules every tick; usually they are the same.
+    if (!changed) return;
     this.maxAdjacentDims = maxAdjacentDims;
     this.birthMin = birthMin;
     this.birthMax = birthMax;
     this.starvationMax = starvationMax;
     this.suffocationMin = suffocationMin;
+
+    if (rebuild) {
+      // NB: Matches ZnBoardGame.isneighbor in gol.py.
+      int count = 0;
+      final int[] offsets = new int[26];
+      for (int dz=-1; dz<=1; dz++) {
+        for (int dy=-1; dy<=1; dy++) {
+          for (int dx=-1; dx<=1; dx++) {
+            final int dims = Math.abs(dx) + Math.abs(dy) + Math.abs(dz);
+            if (dims > 0 && dims <= maxAdjacentDims) offsets[count++] = dx + dy * yStride + dz * zStride;
+          }
+        }
+      }
+      stencil = Arrays.copyOf(offsets, count);
+    }
+
+    // New rules may wake any tile. NB: Flagged only once the rules are all
+    // set, so a generation which takes the flag is sure to see them.
+    rulesChanged.set(true);
   }
 
   public static boolean live(Material m) { return m == LIVE; }
@@ -48,73 +205,457 @@ public class GameOfLife3D {
   public boolean live(int x, int y, int z) { return live(block(x, y, z)); }
   public boolean dead(int x, int y, int z) { return dead(block(x, y, z)); }
 
-  public void step() {
-    // compute next state
-    for (int z=0; z<zLen; z++) {
-      for (int y=0; y<yLen; y++) {
-        for (int x=0; x<xLen; x++) {
-          final Block b = block(x, y, z);
-          final Material m = b.getType();
-          next[x][y][z] = m;
+  /** Gets the index of a cell, relative to the region, in the snapshot. */
+  private int index(int x, int y, int z) { return (x + 1) + (y + 1) * yStride + (z + 1) * zStride; }
 
-          final boolean live = live(m);
-          final boolean dead = dead(m);
-          if (!live && !dead) continue; // this block is not part of the game
+  /** Sets the limits on the blocks written per applyChanges call; 0 for none. */
+  public void setBudget(int maxBlocks, long maxMillis) {
+    this.maxBlocks = maxBlocks;
+    this.maxMillis = maxMillis;
+  }
+
+  /**
+   * Captures a snapshot of each chunk the region or its border overlaps.
+   * Must be called on the main thread; the snapshots may then be read from
+   * any thread.
+   */
+  private ChunkSnapshot[] capture() {
+    final int cx0 = (xMin - 1) >> 4, cz0 = (zMin - 1) >> 4;
+    final int cxLen = ((xMax + 1) >> 4) - cx0 + 1, czLen = ((zMax + 1) >> 4) - cz0 + 1;
+    final ChunkSnapshot[] chunks = new ChunkSnapshot[cxLen * czLen];
+    for (int cx=0; cx<cxLen; cx++) {
+      for (int cz=0; cz<czLen; cz++) {
+        chunks[cx * czLen + cz] = w.getChunkAt(cx0 + cx, cz0 + cz).getChunkSnapshot();
+      }
+    }
+    return chunks;
+  }
 
-          int liveCount = 0;
-          if (live(x-1, y, z)) liveCount++; // n
-          if (live(x+1, y, z)) liveCount++; // e
-          if (live(x, y-1, z)) liveCount++; // d
-          if (live(x, y+1, z)) liveCount++; // u
-          if (live(x, y, z-1)) liveCount++; // n
-          if (live(x, y, z+1)) liveCount++; // s
-          if (live(x-1, y-1, z)) liveCount++; // wd
-          if (live(x-1, y+1, z)) liveCount++; // wu
-          if (live(x+1, y-1, z)) liveCount++; // ed
-          if (live(x+1, y+1, z)) liveCount++; // eu
-          if (live(x-1, y, z-1)) liveCount++; // wn
-          if (live(x-1, y, z+1)) liveCount++; // ws
-          if (live(x+1, y, z-1)) liveCount++; // en
-          if (live(x+1, y, z+1)) liveCount++; // es
-          if (live(x, y-1, z-1)) liveCount++; // dn
-          if (live(x, y-1, z+1)) liveCount++; // ds
-          if (live(x, y+1, z-1)) liveCount++; // un
-          if (live(x, y+1, z+1)) liveCount++; // us
-          if (live(x-1, y-1, z-1)) liveCount++; // wdn
-          if (live(x-1, y-1, z+1)) liveCount++; // wds
-          if (live(x-1, y+1, z-1)) liveCount++; // wun
-          if (live(x-1, y+1, z+1)) liveCount++; // wus
-          if (live(x+1, y-1, z-1)) liveCount++; // edn
-          if (live(x+1, y-1, z+1)) liveCount++; // eds
-          if (live(x+1, y+1, z-1)) liveCount++; // eun
-          if (live(x+1, y+1, z+1)) liveCount++; // eus
-
-          if (live) {
-            // should the cell die?
-            if (liveCount <= starvationMax || liveCount >= suffocationMin) next[x][y][z] = DEAD;
+  /**
+   * Reads the region and its border into the snapshot, a chunk at a time,
+   * from the chunk snapshots taken by capture, rather than from a Block per
+   * cell. Border blocks beyond the world's height are dead.
+   */
+  private void read(final ChunkSnapshot[] chunks) {
+    final int yLo = Math.max(yMin - 1, w.getMinHeight()), yHi = Math.min(yMax + 1, w.getMaxHeight() - 1);
+    int k = 0;
+    for (int cx=(xMin-1)>>4; cx<=(xMax+1)>>4; cx++) {
+      for (int cz=(zMin-1)>>4; cz<=(zMax+1)>>4; cz++) {
+        final ChunkSnapshot s = chunks[k++];
+        final int x0 = Math.max(xMin - 1, cx << 4), x1 = Math.min(xMax + 1, (cx << 4) + 15);
+        final int z0 = Math.max(zMin - 1, cz << 4), z1 = Math.min(zMax + 1, (cz << 4) + 15);
+        for (int z=z0; z<=z1; z++) {
+          for (int y=yLo; y<=yHi; y++) {
+            for (int x=x0; x<=x1; x++) {
+              final boolean border = x < xMin || x > xMax || y < yMin || y > yMax || z < zMin || z > zMax;
+              final Material m = s.getBlockType(x & 15, y, z & 15);
+              // NB: Border blocks are only ever neighbors, never part of the game.
+              final byte c = live(m) ? LIVE_CELL : dead(m) || border ? DEAD_CELL : NOT_IN_GAME;
+              final int i = index(x - xMin, y - yMin, z - zMin);
+              if (cells[i] != c) {
+                // changed since last computed (e.g. by a player): wake the
+                // tile holding it, or for a border block, the tile beside it
+                cells[i] = c;
+                dirty[tile(clamp(x - xMin, xLen), clamp(y - yMin, yLen), clamp(z - zMin, zLen))] = true;
+              }
+            }
           }
-          else {
-            // should the cell be born?
-            if (liveCount >= birthMin && liveCount <= birthMax) next[x][y][z] = LIVE;
+        }
+      }
+    }
+  }
+
+  /** Clamps a coordinate relative to the region into [0, len). */
+  private static int clamp(int c, int len) { return Math.max(0, Math.min(c, len - 1)); }
+
+  /** Gets the index of the tile holding a cell, relative to the region. */
+  private int tile(int x, int y, int z) {
+    return (x >> TILE_BITS) + xTiles * ((y >> TILE_BITS) + yTiles * (z >> TILE_BITS));
+  }
+
+  /** Work over a range of z planes, [lo, hi). */
+  private interface Slab {
+    void run(int lo, int hi);
+  }
+
+  /**
+   * Splits a range of z planes, [0, count), into one slab per thread, and
+   * runs them in parallel, returning once all are done.
+   */
+  private void parallel(final int count, final Slab slab) {
+    final int n = Math.min(parallelism, count);
+    if (pool == null || n <= 1) {
+      slab.run(0, count);
+      return;
+    }
+    final List<Callable<Void>> tasks = new ArrayList<>();
+    for (int k=0; k<n; k++) {
+      final int lo = count * k / n, hi = count * (k + 1) / n;
+      tasks.add(() -> { slab.run(lo, hi); return null; });
+    }
+    for (final Future<Void> f : pool.invokeAll(tasks)) {
+      try {
+        f.get();
+      }
+      catch (final InterruptedException e) {
+        Thread.currentThread().interrupt();
+        throw new RuntimeException(e);
+      }
+      catch (final ExecutionException e) {
+        throw new RuntimeException(e.getCause());
+      }
+    }
+  }
+
+  /**
+   * Fills the running sums of the snapshot's planes [lo, hi), counting the
+   * border planes. Each plane's sums read only that plane. Sums at border
+   * cells are partial or wrap around, but only sums at region cells are used.
+   */
+  private void sum(final int lo, final int hi) {
+    for (int p=lo; p<hi; p++) {
+      if (!planeNeeded(p)) continue;
+      final int base = p * zStride;
+      int prev = cells[base] == LIVE_CELL ? 1 : 0, cur = cells[base+1] == LIVE_CELL ? 1 : 0;
+      for (int i=base+1; i<base+zStride-1; i++) {
+        final int after = cells[i+1] == LIVE_CELL ? 1 : 0;
+        xSums[i] = prev + cur + after;
+        prev = cur; cur = after;
+      }
+      for (int i=base+yStride; i<base+zStride-yStride; i++) {
+        xySums[i] = xSums[i-yStride] + xSums[i] + xSums[i+yStride];
+      }
+    }
+  }
+
+  /**
+   * Gets whether an active tile could read the sums of a snapshot plane,
+   * counting the border planes: whether it lies within one of the plane.
+   */
+  private boolean planeNeeded(final int p) {
+    final int z0 = Math.max(p - 2, 0) >> TILE_BITS, z1 = Math.min(p, zLen - 1) >> TILE_BITS;
+    final int perLayer = xTiles * yTiles;
+    for (int t=z0*perLayer; t<(z1+1)*perLayer; t++) {
+      if (active[t]) return true;
+    }
+    return false;
+  }
+
+  /** Computes the next generation, synchronously, and writes all its changes. */
+  public void step() { step(1); }
+
+  /**
+   * Fast-forwards the given number of generations, synchronously, in
+   * memory; only the final state is written to the world.
+   */
+  public void step(final int generations) {
+    discard();
+    compute(capture(), generations);
+    apply(0, 0);
+  }
+
+  /** Starts computing the next generation off the main thread; see startStep(int). */
+  public boolean startStep() { return startStep(1); }
+
+  /**
+   * Starts computing the given number of generations off the main thread,
+   * from a snapshot of the region captured now; only the final state's
+   * changes are then written, by applyChanges. To write every k-th state,
+   * start k generations at a time. Does nothing, returning false, if the
+   * previous computation is still running or not yet fully applied.
+   */
+  public boolean startStep(final int generations) {
+    if (pending != null || applied < changeCount) return false;
+    final ChunkSnapshot[] chunks = capture();
+    pending = EXECUTOR.submit(() -> compute(chunks, generations));
+    return true;
+  }
+
+  /**
+   * Writes the changes of the last computed generation into the world, up
+   * to the budget (see setBudget); call again in later ticks to continue.
+   * Returns true once every change is written and nothing is computing.
+   */
+  public boolean applyChanges() {
+    if (pending != null) {
+      if (!pending.isDone()) return false;
+      finish();
+    }
+    return apply(maxBlocks, maxMillis);
+  }
+
+  /** Writes computed changes, up to the given limits; 0 for none. */
+  private boolean apply(final int maxBlocks, final long maxMillis) {
+    final long deadline = maxMillis > 0 ? System.nanoTime() + maxMillis * 1000000 : Long.MAX_VALUE;
+    int written = 0;
+    while (applied < changeCount) {
+      if (maxBlocks > 0 && written >= maxBlocks) return false;
+      // NB: Check the clock every few blocks only; nanoTime is not free.
+      if ((written & 15) == 15 && System.nanoTime() >= deadline) return false;
+      final int change = changes[applied++];
+      final int r = change >> 1;
+      final Block b = block(r % xLen, r / xLen % yLen, r / (xLen * yLen));
+      // NB: Blocks may have been edited since the snapshot; leave those not in the game.
+      if (live(b) || dead(b)) b.setType(PALETTE[change & 1]);
+      written++;
+    }
+    return true;
+  }
+
+  /**
+   * Waits for any computing generation, then writes all its remaining
+   * changes, ignoring the budget, so the world is left in one generation.
+   */
+  public void flush() {
+    if (pending != null) finish();
+    apply(0, 0);
+  }
+
+  /**
+   * Gets whether a step is still computing, or its changes are not yet all
+   * written, without waiting on it: the main thread must never block for a
+   * whole generation.
+   */
+  private boolean busy() {
+    if (pending != null) {
+      if (!pending.isDone()) return true;
+      finish();
+    }
+    return applied < changeCount;
+  }
+
+  /** Abandons any computing or partly applied generation. */
+  public void discard() {
+    if (pending != null) finish();
+    changeCount = applied = 0;
+  }
+
+  /** Waits for the pending computation to finish, rethrowing its failure. */
+  private void finish() {
+    try {
+      pending.get();
+    }
+    catch (final InterruptedException e) {
+      Thread.currentThread().interrupt();
+      changeCount = applied = 0;
+    }
+    catch (final ExecutionException e) {
+      changeCount = applied = 0;
+      throw new RuntimeException(e.getCause());
+    }
+    finally {
+      pending = null;
+    }
+  }
+
+  /**
+   * Computes the next states of the cells of active tiles in z planes
+   * [lo, hi), marking the tiles whose cells change as dirty.
+   */
+  private void nextStates(final int lo, final int hi, final int[] stencil, final boolean box,
+    final int birthMin, final int birthMax, final int starvationMax, final int suffocationMin)
+  {
+    for (int z=lo; z<hi; z++) {
+      for (int y=0; y<yLen; y++) {
+        for (int x0=0; x0<xLen; x0+=TILE) {
+          final int t = tile(x0, y, z);
+          if (!active[t]) continue; // this tile is dormant
+          boolean changed = false;
+          final int x1 = Math.min(x0 + TILE, xLen);
+          for (int x=x0; x<x1; x++) {
+            final int i = index(x, y, z);
+            final byte c = cells[i];
+            next[i] = c;
+            if (c == NOT_IN_GAME) continue; // this block is not part of the game
+            final boolean live = c == LIVE_CELL;
+
+            int liveCount = 0;
+            if (box) {
+              // the cell's 3x3x3 box, less the cell itself
+              liveCount = xySums[i-zStride] + xySums[i] + xySums[i+zStride] - (live ? 1 : 0);
+            }
+            else {
+              for (final int o : stencil) {
+                if (cells[i + o] == LIVE_CELL) liveCount++;
+              }
+            }
+
+            if (live) {
+              // should the cell die?
+              if (liveCount <= starvationMax || liveCount >= suffocationMin) next[i] = DEAD_CELL;
+            }
+            else {
+              // should the cell be born?
+              if (liveCount >= birthMin && liveCount <= birthMax) next[i] = LIVE_CELL;
+            }
+            changed |= next[i] != c;
           }
+          // NB: Slabs may share a tile, but only ever set its flags to true.
+          if (changed) dirty[t] = touched[t] = true;
+        }
+      }
+    }
+  }
+
+  /** Copies the next states of the cells of active tiles in z planes [lo, hi). */
+  private void copyNext(final int lo, final int hi) {
+    for (int z=lo; z<hi; z++) {
+      for (int y=0; y<yLen; y++) {
+        for (int x0=0; x0<xLen; x0+=TILE) {
+          if (!active[tile(x0, y, z)]) continue;
+          final int i = index(x0, y, z);
+          System.arraycopy(next, i, cells, i, Math.min(TILE, xLen - x0));
         }
       }
     }
+  }
+
+  /**
+   * Gets the cell state, shared rather than copied: a flat grid with a
+   * one-cell border, holding 1 for live cells, 0 for dead cells and -1 for
+   * blocks not part of the game. The cell at (x, y, z), relative to the
+   * region, lies at index (x+1) + (y+1)*yStride + (z+1)*zStride; see strides.
+   * This is the layout of a gol.Board with extents {zLen, yLen, xLen}.
+   *
+   * It holds the snapshot last read (see snapshot), advanced by the last
+   * computed generations. Writes to it reach the world on commit.
+   */
+  public byte[] cells() { return cells; }
+
+  /** Gets the cell state as a ByteBuffer; see cells. */
+  public ByteBuffer buffer() { return ByteBuffer.wrap(cells); }
+
+  /** Gets the strides of the cell state along x, y and z; see cells. */
+  public int[] strides() { return new int[] {1, yStride, zStride}; }
 
-    // assign next state
+  /** Gets the extents of the cell state, slowest axis first: {zLen, yLen, xLen}. */
+  public int[] extents() { return new int[] {zLen, yLen, xLen}; }
+
+  /** Reads the region into the cell state, abandoning any computation. */
+  public void snapshot() {
+    discard();
+    read(capture());
+    System.arraycopy(cells, 0, before, 0, cells.length);
+  }
+
+  /**
+   * Writes the cell state into the world in one bulk pass, touching only
+   * blocks whose state differs from the snapshot last read or committed.
+   */
+  public void commit() {
+    if (pending != null) finish();
+    Arrays.fill(touched, true);
+    listChanges(true);
+    apply(0, 0);
+    System.arraycopy(cells, 0, before, 0, cells.length);
+  }
+
+  /**
+   * Computes generations from chunk snapshots, entirely in memory, then
+   * lists the cells whose final state differs from the snapshot as changes.
+   */
+  private void compute(final ChunkSnapshot[] chunks, final int generations) {
+    Arrays.fill(touched, false);
+    read(chunks);
+    System.arraycopy(cells, 0, before, 0, cells.length);
+    for (int g=0; g<generations; g++) advance();
+    listChanges(false);
+  }
+
+  /**
+   * Lists the cells of touched tiles whose state differs from the snapshot
+   * as changes, optionally marking their tiles dirty.
+   */
+  private void listChanges(final boolean wake) {
+    int count = 0;
     for (int z=0; z<zLen; z++) {
       for (int y=0; y<yLen; y++) {
-        for (int x=0; x<xLen; x++) {
-          final Block b = block(x, y, z);
-          final Material now = b.getType();
-          final Material soon = next[x][y][z];
-          if (now != soon) b.setType(soon);
+        for (int x0=0; x0<xLen; x0+=TILE) {
+          final int t = tile(x0, y, z);
+          if (!touched[t]) continue;
+          final int x1 = Math.min(x0 + TILE, xLen);
+          for (int x=x0; x<x1; x++) {
+            final int i = index(x, y, z);
+            if (cells[i] != before[i] && before[i] != NOT_IN_GAME) {
+              changes[count++] = (x + xLen * (y + yLen * z)) << 1 | (cells[i] == LIVE_CELL ? 1 : 0);
+              if (wake) dirty[t] = true;
+            }
+          }
+        }
+      }
+    }
+    applied = 0;
+    changeCount = count;
+  }
+
+  /** Advances the cells one generation, via the next buffer. */
+  private void advance() {
+    // NB: Take the flag before reading the rules. If the rules change after
+    // this, the flag is set again, waking every tile next generation.
+    final boolean all = rulesChanged.getAndSet(false);
+    final int[] stencil = this.stencil;
+    final int birthMin = this.birthMin, birthMax = this.birthMax;
+    final int starvationMax = this.starvationMax, suffocationMin = this.suffocationMin;
+
+    // activate the tiles next to dirty ones, then clear the dirty marks
+    Arrays.fill(active, all);
+    for (int tz=0; tz<zTiles && !all; tz++) {
+      for (int ty=0; ty<yTiles; ty++) {
+        for (int tx=0; tx<xTiles; tx++) {
+          if (!dirty[tx + xTiles * (ty + yTiles * tz)]) continue;
+          for (int z=Math.max(tz-1, 0); z<=Math.min(tz+1, zTiles-1); z++) {
+            for (int y=Math.max(ty-1, 0); y<=Math.min(ty+1, yTiles-1); y++) {
+              for (int x=Math.max(tx-1, 0); x<=Math.min(tx+1, xTiles-1); x++) {
+                active[x + xTiles * (y + yTiles * z)] = true;
+              }
+            }
+          }
         }
       }
     }
+    Arrays.fill(dirty, false);
+
+    // NB: Box sums count the full 26-neighborhood; smaller ones use the stencil.
+    final boolean box = stencil.length == 26;
+    if (box) parallel(zLen + 2, this::sum);
+
+    // compute next state, a slab of z planes per thread
+    parallel(zLen, (lo, hi) -> nextStates(lo, hi, stencil, box,
+      birthMin, birthMax, starvationMax, suffocationMin));
+
+    // copy the next state back into the cells, which Python may share
+    parallel(zLen, this::copyNext);
+  }
+
+  /**
+   * Makes runs of blocks live in bulk, e.g. to seed the game from a pattern.
+   * Each run is four ints: the x, y and z of its first block, relative to the
+   * region, then its length along +x. Runs are clipped to the region, and
+   * blocks not part of the game are left alone. Does nothing, returning
+   * false, while a step is computing or not yet fully applied (see busy).
+   */
+  public boolean setRuns(final int[] runs) {
+    if (busy()) return false;
+    for (int i=0; i+3<runs.length; i+=4) {
+      final int y = runs[i+1], z = runs[i+2];
+      if (y < 0 || y >= yLen || z < 0 || z >= zLen) continue;
+      final int x0 = Math.max(runs[i], 0);
+      final int x1 = Math.min(runs[i] + runs[i+3], xLen);
+      for (int x=x0; x<x1; x++) {
+        final Block b = block(x, y, z);
+        if (dead(b)) b.setType(LIVE);
+      }
+    }
+    return true;
   }
 
-  public void shuffle(final double saturation) {
+  /**
+   * Randomizes the region's blocks which are part of the game. Does
+   * nothing, returning false, while a step is computing or not yet fully
+   * applied (see busy).
+   */
+  public boolean shuffle(final double saturation) {
+    if (busy()) return false;
     for (int z=0; z<zLen; z++) {
       for (int y=0; y<yLen; y++) {
         for (int x=0; x<xLen; x++) {
@@ -130,5 +671,6 @@ public class GameOfLife3D {
         }
       }
     }
+    return true;
   }
 }
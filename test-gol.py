@@ -1,5 +1,12 @@
 import gol
 
+# Functions converting a dict board into each board type, the dict itself first.
+CONVERTERS = (lambda b: b, gol.sparse_board, gol.dense_board, gol.Board, gol.BitBoard)
+# Those whose boards are bounded by the dict's extents, as a sparse board is not.
+BOUNDED = tuple(convert for convert in CONVERTERS if convert is not gol.sparse_board)
+# Those whose boards are compact (see gol.Board).
+COMPACT = (gol.Board, gol.BitBoard)
+
 def board2str(board, w, h):
     s = ''
     for y in range(h):
@@ -8,6 +15,10 @@ def board2str(board, w, h):
         s += '\n'
     return s
 
+def board3str(board, w, h, d):
+    return '\n'.join(board2str({(x, y): board[(x, y, z)] for x in range(w) for y in range(h)}, w, h)
+                     for z in range(d))
+
 # Test 2D
 gol2d = gol.GameOfLife()
 w = 7; h = 5
@@ -38,6 +49,18 @@ X......
 """
 ]
 
+for board in boards2d:
+    assert board.lstrip() == board2str(game.state, w, h)
+    game.next()
+
+# Test 2D, sparse
+game = gol2d.start(gol.sparse_board(gol.random_board([w, h], seed=12345)))
+for board in boards2d:
+    assert board.lstrip() == board2str(game.state, w, h)
+    game.next()
+
+# Test 2D, dense (or dict, if NumPy is unavailable)
+game = gol2d.start(gol.dense_board(gol.random_board([w, h], seed=12345)))
 for board in boards2d:
     assert board.lstrip() == board2str(game.state, w, h)
     game.next()
@@ -46,5 +69,329 @@ for board in boards2d:
 gol3d = gol.GameOfLife(max_adjacent_dims=3, isolation_threshold=5, birth_min=6, birth_max=7, overcrowding_threshold=9)
 w = 2; h = 3; d = 4
 game = gol3d.start(gol.random_board([w, h, d], seed=0xdeadbeef))
+
+# NB: Generated by: python bench-gol.py --expected3d
+boards3d = [
+"""
+X.
+..
+..
+
+..
+..
+..
+
+..
+..
+..
+
+..
+..
+..
+""",
+"""
+..
+..
+..
+
+..
+..
+..
+
+..
+..
+..
+
+..
+..
+..
+""",
+"""
+..
+..
+..
+
+..
+..
+..
+
+..
+..
+..
+
+..
+..
+..
+"""
+]
+
+for board in boards3d:
+    assert board.lstrip() == board3str(game.state, w, h, d)
+    game.next()
+
+# Test 3D, on a board which keeps evolving, for every bounded board type
+# NB: A sparse board is unbounded, so it grows past this board's edges.
+board = gol.random_board([9, 7, 5], saturation=0.3, seed=0xdeadbeef)
+for convert in BOUNDED:
+    expected = gol3d.start(board)
+    game = gol3d.start(convert(board))
+    populations = []
+    for i in range(4):
+        cells = set(c for c, live in gol.dict_board(game.state).items() if live)
+        assert cells == set(c for c, live in expected.state.items() if live)
+        populations.append(len(cells))
+        expected.next()
+        game.next()
+    assert populations == [84, 75, 89, 79]
+
+# Test dense boards step the same as dict boards
+board = gol.random_board([6, 5, 4], saturation=0.3, seed=7)
+for dims in (1, 2, 3):
+    game = gol.GameOfLife(max_adjacent_dims=dims, isolation_threshold=1, birth_min=2, birth_max=3, overcrowding_threshold=5)
+    assert gol.dict_board(game.nextgamestate(gol.dense_board(board))) == game.nextgamestate(board)
+
+# Test HashLife jumps match sparse stepping, even with a tiny node cache
+import hashlife
+board = gol.random_board([20, 20], saturation=0.35, seed=3)
+for max_nodes in (1000000, 60):
+    hl = hashlife.HashLife(gol2d, board, max_nodes=max_nodes)
+    game = gol2d.start(gol.sparse_board(board))
+    for n in (1, 2, 3, 7, 16, 5):
+        hl.advance(n)
+        for i in range(n): game.next()
+        assert hl.board().cells == game.state.cells
+    assert hl.generation == 34
+try:
+    hashlife.HashLife(gol.LargerThanLife(2, 3, 5, 7, 10), board)
+    assert False, "HashLife accepted a neighborhood of radius 2"
+except Exception as e:
+    assert 'radius' in str(e)
+
+# Test incremental stepping matches full stepping, for every board type
+board = gol.random_board([12, 10], saturation=0.3, seed=99)
+for convert in CONVERTERS:
+    full = gol2d.start(convert(board))
+    game = gol2d.start(convert(board), incremental=True)
+    for i in range(8):
+        before = gol.dict_board(game.state)
+        full.next()
+        game.next()
+        after = gol.dict_board(game.state)
+        assert gol.dict_board(full.state) == after
+        assert game.changed == set(c for c in set(before) | set(after)
+                                   if before.get(c, False) != after.get(c, False))
+
+# Test sharded boards step the same as dict boards
+board = gol.random_board([9, 7, 5], saturation=0.3, seed=2024)
+del board[(4, 3, 2)] # a cell not part of the game
+gol3d = gol.GameOfLife(max_adjacent_dims=2, isolation_threshold=1, birth_min=2, birth_max=3, overcrowding_threshold=5)
+for workers in (1, 3):
+    expected = gol3d.start(board)
+    game = gol3d.start(gol.ShardedBoard(board, workers=workers))
+    for i in range(4):
+        expected.next()
+        game.next()
+        assert gol.dict_board(game.state) == expected.state
+    game.state.close()
+
+# Test an empty sharded board seeds and steps like a Board, without a dict
+sharded, expected = gol.ShardedBoard(extents=[9, 7, 5], workers=3), gol.Board(extents=[9, 7, 5])
+for compact in (sharded, expected): gol.fill_random(compact, saturation=0.3, seed=7, chunk=4)
+assert any(gol.dict_board(sharded).values())
+assert gol.dict_board(sharded) == gol.dict_board(expected)
+expected, game = gol3d.start(expected), gol3d.start(sharded)
+for i in range(4):
+    expected.next()
+    game.next()
+    assert gol.dict_board(game.state) == gol.dict_board(expected.state)
+game.state.close()
+
+# Test compact boards step the same as dict boards
+for extents, game in (([20, 15], gol2d), ([9, 7, 5], gol3d)):
+    board = gol.random_board(extents, saturation=0.4, seed=1)
+    del board[tuple(extent // 2 for extent in extents)] # a cell not part of the game
+    for compact in COMPACT:
+        expected = game.start(board)
+        actual = game.start(compact(board))
+        for i in range(5):
+            expected.next()
+            actual.next()
+            assert gol.dict_board(actual.state) == expected.state
+
+# Test compact boards reject cells beyond their extents, as a dict would
+board = gol.random_board([5, 6], saturation=0.4, seed=3)
+for compact in [convert(board) for convert in COMPACT]:
+    assert list(compact.keys()) == sorted(board) and list(compact.values()) == [board[c] for c in sorted(board)]
+    for cell in ((0, 6), (0, 7), (5, 0), (-1, 2), (9, 9), (1, 2, 3)):
+        for access in (lambda: compact[cell], lambda: compact.__setitem__(cell, True),
+                       lambda: compact.setrun(cell, [True])):
+            try:
+                access()
+                assert False, "cell %s is beyond the board" % (cell,)
+            except KeyError:
+                pass
+    try:
+        compact.setrun((2, 4), [True] * 3)
+        assert False, "a run beyond the board should raise"
+    except KeyError:
+        pass
+    assert dict(compact.items()) == board
+
+# Test cycle detection finds the blinker's period and stops there
+for convert in CONVERTERS:
+    cycles = []
+    game = gol2d.start(convert(gol.random_board([7, 5], seed=12345)), history=4,
+                       on_cycle=cycles.append, stop_on_cycle=True)
+    try:
+        while True: game.next()
+    except StopIteration:
+        pass
+    assert game.generation == 3 and game.period == 2 and not game.is_stable
+    assert cycles == [game]
+
+# Test cycle detection recognizes a still life
+board = gol.random_board([4, 4], saturation=0)
+for cell in ((1, 1), (1, 2), (2, 1), (2, 2)): board[cell] = True
+game = gol2d.start(board, history=1)
+game.next()
+assert game.is_stable
+
+# Test chunked random boards regenerate independently and fill compact boards alike
+extents = [37, 21, 5]
+chunks = dict(gol.random_chunks(extents, chunk=8, saturation=0.3, seed=42))
+board = {}
+for chunk in chunks.values(): board.update(chunk)
+assert len(board) == 37 * 21 * 5
+assert gol.random_chunk(extents, (2, 1, 0), chunk=8, saturation=0.3, seed=42) == chunks[(2, 1, 0)]
+for compact in [convert(extents=extents) for convert in COMPACT]:
+    gol.fill_random(compact, saturation=0.3, seed=42, chunk=8)
+    assert gol.dict_board(compact) == board
+assert 0.25 < sum(board.values()) / float(len(board)) < 0.35
+if gol.numpy is not None:
+    # NB: NumPy arrays draw from NumPy's generator, so only match themselves.
+    dense = [gol.dense_board(gol.random_board(extents, saturation=0)) for i in range(2)]
+    for compact in dense: gol.fill_random(compact, saturation=0.3, seed=42, chunk=8)
+    assert (dense[0] == dense[1]).all() and 0.25 < dense[0].mean() < 0.35
+
+# Test Larger than Life counts match enumerating each neighborhood
+ltl = gol.LargerThanLife(2, 6, 8, 12, 16)
+full = gol.random_board([30, 25], saturation=0.35, seed=4)
+holed = dict(full)
+del holed[(10, 8)] # a cell not part of the game
+for board, convert in ((holed, lambda b: b), (holed, gol.Board), (full, gol.dense_board)):
+    expected = gol.NeighborhoodBoardGame.nextgamestate(ltl, board)
+    assert gol.dict_board(ltl.nextgamestate(convert(board))) == expected
+
+# Test step diffs replay onto the previous board, for every board type
+board = gol.random_board([12, 10], saturation=0.3, seed=13)
+for convert in CONVERTERS:
+    game = gol2d.start(convert(board), diffs=True)
+    replayed = dict(board)
+    for i in range(5):
+        changes = game.next()
+        assert changes is game.changes
+        for cell, old, new in changes:
+            assert bool(replayed.get(cell, False)) == bool(old) != bool(new)
+            replayed[cell] = bool(new)
+        assert set(c for c in replayed if replayed[c]) == \
+               set(c for c, live in gol.dict_board(game.state).items() if live)
+
+# Test snapshots and generation streams round-trip, scrubbing to any generation
+import golfile, os, tempfile
+board = gol.random_board([11, 6, 4], saturation=0.3, seed=77)
+del board[(5, 3, 1)] # a cell not part of the game
+gol3d = gol.GameOfLife(max_adjacent_dims=2, isolation_threshold=1, birth_min=2, birth_max=3, overcrowding_threshold=5)
+fd, path = tempfile.mkstemp(suffix='.gol')
+os.close(fd)
+try:
+    golfile.save(path, gol.Board(board), gol3d)
+    game, loaded = golfile.load(path)
+    assert loaded == board and game.rules == gol3d.rules and game.max_adjacent_dims == 2
+    state = gol3d.start(board, diffs=True)
+    expected = [board]
+    with golfile.GenerationWriter(path, board, keyframe=3) as writer:
+        for i in range(8):
+            writer.append(state.next())
+            expected.append(state.state)
+    with open(path, 'ab') as f: f.write(b'\x01\xff') # an interrupted record
+    with golfile.GenerationReader(path) as reader:
+        assert len(reader) == 9 and reader.game is None
+        for g in (8, 0, 4, 3, 7):
+            assert reader.board(g) == expected[g]
+    with open(path, 'rb') as f:
+        # NB: Loading a stream reads no further than its first record.
+        assert golfile.load(f) == (None, board)
+        assert f.tell() < os.path.getsize(path) // 2
+
+    # A glider on a sparse board leaves its first extents, unless given room.
+    glider = gol.SparseBoard([(0, 1), (1, 2), (2, 0), (2, 1), (2, 2)])
+    try:
+        with golfile.GenerationWriter(path, glider) as writer:
+            writer.append(gol2d.start(glider, diffs=True).next())
+        assert False, "a change beyond the extents should raise"
+    except Exception as e:
+        assert 'outside the recorded extents' in str(e)
+    state = gol2d.start(glider, diffs=True)
+    expected = [set(glider.cells)]
+    with golfile.GenerationWriter(path, glider, extents=[10, 10]) as writer:
+        for i in range(12):
+            writer.append(state.next())
+            expected.append(set(state.state.cells))
+    with golfile.GenerationReader(path) as reader:
+        assert reader.extents == [10, 10] and len(reader) == 13
+        for g in range(13):
+            assert set(c for c, live in reader.board(g).items() if live) == expected[g]
+finally:
+    os.remove(path)
+
+# Test RLE and plaintext patterns stream into every board type alike
+import golpattern
+glider_rle = ["#N Glider\n", "#C A small spaceship.\n", "x = 3, y = 3, rule = B3/S23\n", "bo$2b\n", "o$3o!\n"]
+glider_cells = ["!Name: Glider\n", ".O.\n", "..O\n", "OOO\n"]
+expected = set([(0, 1), (1, 2), (2, 0), (2, 1), (2, 2)])
+for lines in (glider_rle, glider_cells):
+    pattern = golpattern.Pattern(lines)
+    assert pattern.name == 'Glider'
+    assert set(golpattern.sparse(pattern).cells) == expected
+assert golpattern.Pattern(glider_rle).game().rules == gol2d.rules
+assert golpattern.Pattern(["x = 0, y = 0, rule = 23/3\n"]).game().rules == gol2d.rules
+assert set(golpattern.sparse(golpattern.Pattern(glider_rle[3:])).cells) == expected
+fd, path = tempfile.mkstemp(suffix='.rle')
+try:
+    with os.fdopen(fd, 'w') as f: f.writelines(glider_rle)
+    pattern = golpattern.Pattern(u'' + path) # a path from a Java string is unicode
+    assert pattern.format == 'rle' and not pattern._file.closed
+    assert set(golpattern.sparse(pattern).cells) == expected and pattern._file.closed
+finally:
+    os.remove(path)
+blank = gol.random_board([5, 6], saturation=0)
+for convert in CONVERTERS:
+    board = golpattern.fill(convert(dict(blank)), golpattern.Pattern(glider_rle), corner=(1, 2))
+    assert set(c for c, live in gol.dict_board(board).items() if live) == \
+           set((r + 1, c + 2) for r, c in expected)
+for corner in ((1, 4), (3, 2), (-1, -1)): # hanging over an edge
+    clipped = dict(blank)
+    for r, c in expected:
+        if (r + corner[0], c + corner[1]) in clipped: clipped[(r + corner[0], c + corner[1])] = True
+    for convert in BOUNDED[1:]: # but the dict, which grows
+        if convert is gol.dense_board and gol.numpy is None: continue # a dict too
+        board = golpattern.fill(convert(dict(blank)), golpattern.Pattern(glider_rle), corner=corner)
+        assert gol.dict_board(board) == clipped
+        assert gol.dict_board(gol2d.nextgamestate(board)) == gol2d.nextgamestate(clipped)
+
+# Test boards wrapping a shared buffer read and write it in place
+board = gol.random_board([3, 4, 5], saturation=0.4, seed=5)
+del board[(1, 2, 3)] # a cell not part of the game
+owner = gol.Board(board)
+shared = gol.Board.frombuffer(owner.buffer, owner.extents)
+assert dict(shared.items()) == dict(owner.items())
+shared[(2, 3, 4)] = not owner[(2, 3, 4)]
+assert shared[(2, 3, 4)] == owner[(2, 3, 4)] and (1, 2, 3) not in shared
+try:
+    gol2d.start(shared).next()
+    assert False, "a board sharing a buffer should not advance"
+except Exception as e:
+    assert 'cannot advance' in str(e)
+game = gol3d.start(shared.copy())
 game.next()
-# TODO: Assert game states match expected.
+assert gol.dict_board(game.state) == gol3d.nextgamestate(dict(owner.items()))